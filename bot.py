@@ -6,11 +6,12 @@ from packages import paths
 
 load_dotenv(paths.env)
 TELE_TOKEN = getenv('TELE_TOKEN')
+ADMIN_IDS = [int(admin_id) for admin_id in (getenv('ADMIN_IDS') or '').split(',') if admin_id.strip()]
 
 
 
 
-a = TeleSession(TELE_TOKEN)
+a = TeleSession(TELE_TOKEN, admin_ids=ADMIN_IDS)
 try:      
     a.start()
 except KeyboardInterrupt as e:
@@ -1,4 +1,9 @@
+from argparse import ArgumentParser
+
 from packages import data_handler
+from packages import exporter
+from packages import paths
+from packages.history import SectionHistory
 
 class console_main:
     def __init__(self):
@@ -20,12 +25,43 @@ class console_main:
             #     for Id, Name in Search_list.items():
             #         file.write(f'{Id}:{Name}\n'.encode('utf-8'))
 
+    def export(self, file_path: str, file_format: str, compression: str=None, since: int=None) -> int:
+        """Scrapes a snapshot and streams it to `file_path`
 
-            
+            - the history of the bot is only read, the changes it did not record yet
+              are exported as a version after its last one without saving them
+            - returns the number of exported rows or -1 if scraping failed"""
+        if not (response := self.data_handler.run()):
+            print('Data retrieval failed')
+            return -1
+        history = SectionHistory(paths.history, read_only=True)
+        recorded = history.version
+        history.record(response)
+        count = exporter.export(response, file_path, file_format, compression, since, history)
+        print(f'Exported {count} rows to {file_path}, history version {recorded}'
+              + (' with changes the bot did not record yet' if response.version > recorded else ''))
+        return count
 
 
+def parse_args():
+    parser = ArgumentParser(description='Scrapes the timetable from the console')
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('save', help='save the timetable as data/subjects_list.json (default)')
+    export = commands.add_parser('export', help='stream the timetable to a file')
+    export.add_argument('file_format', choices=exporter.FORMATS)
+    export.add_argument('file_path')
+    export.add_argument('--compress', choices=tuple(exporter.COMPRESSIONS), default=None)
+    export.add_argument('--since', type=int, default=None, metavar='VERSION',
+                        help='only export the sections that changed after this history version')
+    return parser.parse_args()
+
 
 if __name__ == '__main__':
+    args = parse_args()
     main = console_main()
-    main.start_session()
+    if args.command == 'export':
+        main.export(args.file_path, args.file_format, args.compress, args.since)
+    else:
+        main.start_session()
+
     
\ No newline at end of file
@@ -0,0 +1,240 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import Callable, Optional
+from collections import deque
+from time import time, perf_counter
+import threading
+import random
+import ujson
+
+
+class FakeServer:
+    """A local stand-in for the Telegram Bot API and the Edugate timetable
+
+            :param host: address to listen at
+            :param port: port to listen at, 0 picks a free one
+            :param subject_count: subjects in the generated timetable
+            :param on_reply: called with `(chat_id, text, perf_counter())` for every
+                `sendMessage` and `editMessageText` the bot makes
+
+        Telegram is served at `/bot<TOKEN>/<METHOD>` with the methods `TeleSession` uses,
+        updates are queued with `push_message` and handed out by `getUpdates`.
+        The timetable is served at `/timetable` as the JSF page and partial response
+        that `DataSession` scrapes, so the whole bot runs offline against it.
+
+            ~"""
+    SECTIONS_PER_SUBJECT = 4
+    NAME_WORDS = ('برمجة', 'مهارات', 'رياضيات', 'فيزياء', 'قواعد', 'بيانات', 'شبكات', 'تصميم',
+                  'اللغة', 'العربية', 'الانجليزية', 'هندسة', 'برمجيات', 'ذكاء', 'اصطناعي', 'أمن')
+    TIMES = ('Sun Tue Thu 08:00-09:00', 'Sun Tue Thu 09:00-10:00', 'Sun Tue Thu 10:00-11:00',
+             'Sun Tue Thu 11:00-12:00', 'Mon Wed 08:00-09:30', 'Mon Wed 09:30-11:00',
+             'Mon Wed 11:00-12:30', 'Mon Wed 12:30-14:00')
+
+    def __init__(self, host: str='127.0.0.1', port: int=0, subject_count: int=1000,
+                 on_reply: Optional[Callable[[int, str, float], None]]=None):
+        self.on_reply = on_reply
+        self.calls = {}
+        """{'METHOD': COUNT} the Telegram methods the bot called"""
+        self.timetable_requests = 0
+
+        self.__updates = deque()
+        self.__update_id = 0
+        self.__message_id = 0
+        self.__condition = threading.Condition()
+        self.__stats_lock = threading.Lock()
+        self.__stopped = False
+
+        self.subjects = self.__generate_subjects(subject_count)
+        """{'ID': {'SECTION': {...}}} the generated timetable, same layout as `Subjects.list`"""
+        self.__timetable_response = self.__render_timetable().encode('utf-8')
+
+        self.__server = ThreadingHTTPServer((host, port), self.__handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def api_url(self) -> str:
+        """The value of `telebot.apihelper.API_URL` that points the bot at this server"""
+        return self.address + '/bot{0}/{1}'
+
+    @property
+    def timetable_url(self) -> str:
+        return self.address + '/timetable'
+
+    def start(self) -> None:
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def push_message(self, chat_id: int, text: str) -> float:
+        """Queues a text message from the user `chat_id` and returns the `perf_counter()` it was queued at"""
+        with self.__condition:
+            self.__update_id += 1
+            self.__message_id += 1
+            self.__updates.append({
+                'update_id': self.__update_id,
+                'message': {
+                    'message_id': self.__message_id,
+                    'date': int(time()),
+                    'chat': {'id': chat_id, 'type': 'private'},
+                    'from': {'id': chat_id, 'is_bot': False, 'first_name': f'User{chat_id}',
+                             'last_name': '', 'username': f'user{chat_id}', 'language_code': 'en'},
+                    'text': text,
+                }
+            })
+            queued_at = perf_counter()
+            self.__condition.notify_all()
+        return queued_at
+
+    def __get_updates(self, params: dict) -> list:
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 100))
+        # waits a little even with timeout=0 so an idle bot does not spin
+        wait = max(float(params.get('timeout', 0)), 0.05)
+        with self.__condition:
+            while self.__updates and self.__updates[0]['update_id'] < offset:
+                self.__updates.popleft()
+            if not self.__updates and not self.__stopped:
+                self.__condition.wait(wait)
+            while self.__updates and self.__updates[0]['update_id'] < offset:
+                self.__updates.popleft()
+            return [self.__updates[index] for index in range(min(limit, len(self.__updates)))]
+
+    def __bot_message(self, chat_id: int, text: str, message_id: Optional[int]=None) -> dict:
+        if message_id is None:
+            with self.__condition:
+                self.__message_id += 1
+                message_id = self.__message_id
+        return {
+            'message_id': message_id,
+            'date': int(time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': 1, 'is_bot': True, 'first_name': 'FakeBot', 'username': 'fake_bot'},
+            'text': text,
+        }
+
+    def _telegram(self, method: str, params: dict):
+        """Returns the result of a Telegram Bot API method"""
+        with self.__stats_lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if method == 'getUpdates':
+            return self.__get_updates(params)
+        if method == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'FakeBot', 'username': 'fake_bot'}
+        if method in ('sendMessage', 'editMessageText'):
+            chat_id = int(params['chat_id'])
+            text = params.get('text', '')
+            if self.on_reply:
+                self.on_reply(chat_id, text, perf_counter())
+            message_id = int(params['message_id']) if 'message_id' in params else None
+            return self.__bot_message(chat_id, text, message_id)
+        if method == 'editMessageReplyMarkup':
+            return self.__bot_message(int(params['chat_id']), '', int(params['message_id']))
+        # answerCallbackQuery, deleteWebhook and the like only need to succeed
+        return True
+
+    def _timetable(self, method: str) -> bytes:
+        """Returns the timetable page for a GET and its partial response for a POST"""
+        with self.__stats_lock:
+            self.timetable_requests += 1
+        if method == 'GET':
+            return (b'<html><body><form><input type="hidden" '
+                    b'name="javax.faces.ViewState" value="fake-view-state"/></form></body></html>')
+        return self.__timetable_response
+
+    def __generate_subjects(self, subject_count: int) -> dict:
+        generator = random.Random(subject_count)
+        subjects = {}
+        for number in range(subject_count):
+            ID = str(100000 + number * 7)
+            name = ' '.join(generator.sample(self.NAME_WORDS, 2)) + f' {number % 4 + 1}'
+            subjects[ID] = {
+                str(section): {
+                    'name': name,
+                    'time': generator.choice(self.TIMES),
+                    'class': f'B{generator.randint(100, 130)}',
+                    'status': generator.choice(('Open', 'Closed')),
+                    'teacher': f'Teacher {generator.randint(1, 120)}',
+                }
+                for section in range(1, self.SECTIONS_PER_SUBJECT + 1)
+            }
+        return subjects
+
+    def __render_timetable(self) -> str:
+        """Renders the timetable the way the JSF partial response lays out its labels"""
+        rows = []
+        row = 0
+        for ID, sections in self.subjects.items():
+            for section, data in sections.items():
+                prefix = f'serviceContents:scheduleDtl:{row}:j_idt'
+                for code, value in (('76', ID), ('78', data['name']), ('82', data['time']),
+                                    ('84', data['class']), ('86', section), ('88', data['status']),
+                                    ('90', data['teacher'])):
+                    rows.append(f'<td><label id="{prefix}{code}" class="ui-outputlabel">{value}</label></td>')
+                row += 1
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n<partial-response><changes>'
+                '<update id="serviceContents:scheduleDtl"><![CDATA[<table><tbody><tr>'
+                + '</tr><tr>'.join(rows) +
+                '</tr></tbody></table>]]></update>'
+                '<update id="javax.faces.ViewState"><![CDATA[fake-view-state]]></update>'
+                '</changes></partial-response>')
+
+    def __handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.__dispatch()
+
+            def do_POST(self):
+                self.__dispatch()
+
+            def __dispatch(self):
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                if body and 'json' not in (self.headers.get('Content-Type') or ''):
+                    params.update({key: values[-1] for key, values in parse_qs(body.decode('utf-8')).items()})
+
+                if url.path == '/timetable':
+                    return self.__send(server._timetable(self.command), 'text/html' if self.command == 'GET' else 'text/xml')
+
+                parts = url.path.strip('/').split('/')
+                if len(parts) != 2 or not parts[0].startswith('bot'):
+                    return self.__send(b'{"ok":false,"error_code":404,"description":"Not Found"}',
+                                       'application/json', 404)
+                result = server._telegram(parts[1], params)
+                self.__send(ujson.dumps({'ok': True, 'result': result}, ensure_ascii=False).encode('utf-8'),
+                            'application/json')
+
+            def __send(self, body: bytes, content_type: str, status: int=200):
+                self.send_response(status)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __repr__(self):
+        return f"FakeServer(address={self.address}, subjects={len(self.subjects)})"
+
+
+__all__ = ['FakeServer']
@@ -0,0 +1,199 @@
+from argparse import ArgumentParser
+from os import chdir, makedirs
+from os.path import abspath, dirname
+from time import perf_counter, sleep
+import tempfile
+import threading
+import shutil
+import random
+import heapq
+import sys
+import ujson
+
+sys.path.insert(0, dirname(abspath(__file__)))
+from fake_server import FakeServer
+
+
+class LoadTest:
+    """Drives synthetic users against a real `TeleSession` through a `FakeServer`
+
+            :param server: the fake Telegram and timetable server the bot talks to
+            :param users: how many synthetic users to simulate
+            :param requests_per_user: requests every user sends one after the other
+            :param mix: `{'search': WEIGHT, 'get': WEIGHT, 'fav': WEIGHT}` how often each command is sent
+            :param think_time: mean seconds a user waits after a reply before the next request
+            :param ramp_up: seconds over which the users send their first request
+            :param timeout: seconds after which a request without a reply is an error
+
+        Every user waits for the final reply of a request before sending the next one,
+        the "please wait" messages the bot sends before editing them are not final replies.
+
+            ~"""
+    def __init__(self, server: FakeServer, users: int, requests_per_user: int, mix: dict,
+                 think_time: float=1.0, ramp_up: float=5.0, timeout: float=30.0, seed: int=0):
+        from packages import MESSAGES
+        self.wait_prefixes = tuple(text.split('{')[0] for text in (
+            MESSAGES.GET_WAIT_1F, MESSAGES.GET_WAIT_2F, MESSAGES.FAV_WAIT_1, MESSAGES.PLAN_WAIT_1)) + ('Searching...',)
+        self.error_replies = ('Wait for your request! ♥', 'ERROR')
+
+        self.server = server
+        self.server.on_reply = self.__on_reply
+        self.users = users
+        self.requests_per_user = requests_per_user
+        self.mix = mix
+        self.think_time = think_time
+        self.ramp_up = ramp_up
+        self.timeout = timeout
+        self.__random = random.Random(seed)
+
+        self.__lock = threading.Lock()
+        self.__schedule = []
+        """heap of (perf_counter, chat_id) requests that are due"""
+        self.__pending = {}
+        """{chat_id: (command, queued_at)} requests waiting for their final reply"""
+        self.__remaining = {}
+        self.latencies = {command: [] for command in mix}
+        self.errors = {command: 0 for command in mix}
+        self.timeouts = {command: 0 for command in mix}
+
+    def run(self) -> float:
+        """Runs until every user sent all of its requests, returns the elapsed seconds"""
+        start = perf_counter()
+        first_chat_id = 1000
+        with self.__lock:
+            for chat_id in range(first_chat_id, first_chat_id + self.users):
+                self.__remaining[chat_id] = self.requests_per_user
+                heapq.heappush(self.__schedule, (start + self.__random.uniform(0, self.ramp_up), chat_id))
+
+        while True:
+            now = perf_counter()
+            with self.__lock:
+                if not self.__schedule and not self.__pending:
+                    break
+                due = []
+                while self.__schedule and self.__schedule[0][0] <= now:
+                    due.append(heapq.heappop(self.__schedule)[1])
+                for chat_id, (command, queued_at) in list(self.__pending.items()):
+                    if now - queued_at > self.timeout:
+                        del self.__pending[chat_id]
+                        self.timeouts[command] += 1
+                        self.__next(chat_id, now)
+            for chat_id in due:
+                command, text = self.__request()
+                with self.__lock:
+                    self.__pending[chat_id] = (command, perf_counter())
+                self.server.push_message(chat_id, text)
+            sleep(0.005)
+        return perf_counter() - start
+
+    def __request(self) -> tuple:
+        """Returns a random `(command, text)` following the mix"""
+        command = self.__random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        ID = self.__random.choice(list(self.server.subjects))
+        section = str(self.__random.randint(1, self.server.SECTIONS_PER_SUBJECT))
+        if command == 'search':
+            return command, f'/search {self.__random.choice(self.server.NAME_WORDS)}'
+        if command == 'get':
+            return command, f'/get {ID}' if self.__random.random() < 0.5 else f'/get {ID} {section}'
+        return command, f'/fav add {ID} {section}' if self.__random.random() < 0.5 else '/fav show'
+
+    def __on_reply(self, chat_id: int, text: str, replied_at: float) -> None:
+        if text.startswith(self.wait_prefixes):
+            return
+        with self.__lock:
+            if chat_id not in self.__pending:
+                return
+            command, queued_at = self.__pending.pop(chat_id)
+            self.latencies[command].append(replied_at - queued_at)
+            if text in self.error_replies:
+                self.errors[command] += 1
+            self.__next(chat_id, replied_at)
+
+    def __next(self, chat_id: int, now: float) -> None:
+        """Schedules the next request of a user, must hold the lock"""
+        self.__remaining[chat_id] -= 1
+        if self.__remaining[chat_id] > 0:
+            heapq.heappush(self.__schedule, (now + self.__random.expovariate(1 / self.think_time), chat_id))
+
+    def report(self, elapsed: float) -> str:
+        """Returns the throughput, latency percentiles and error rates as text"""
+        lines = [f'{"command":<8} {"sent":>7} {"ok":>7} {"err%":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}']
+        all_latencies = []
+        totals = [0, 0]
+        for command in self.mix:
+            latencies = sorted(self.latencies[command])
+            all_latencies += latencies
+            failed = self.errors[command] + self.timeouts[command]
+            sent = len(latencies) + self.timeouts[command]
+            totals[0] += sent
+            totals[1] += failed
+            lines.append(self.__report_line(command, sent, failed, latencies))
+        lines.append(self.__report_line('all', totals[0], totals[1], sorted(all_latencies)))
+        lines.append('')
+        lines.append(f'elapsed: {elapsed:.2f}s, throughput: {totals[0] / elapsed:.1f} requests/s, '
+                     f'timeouts: {sum(self.timeouts.values())}')
+        lines.append(f'telegram calls: {ujson.dumps(self.server.calls)}, '
+                     f'timetable requests: {self.server.timetable_requests}')
+        return '\n'.join(lines)
+
+    @staticmethod
+    def __report_line(command: str, sent: int, failed: int, latencies: list) -> str:
+        def percentile(value: float) -> str:
+            if not latencies:
+                return '-'
+            return f'{latencies[min(len(latencies) - 1, int(value * len(latencies)))] * 1000:.1f}'
+        error_rate = failed / sent * 100 if sent else 0
+        return (f'{command:<8} {sent:>7} {sent - failed:>7} {error_rate:>6.2f} '
+                f'{percentile(0.50):>8} {percentile(0.95):>8} {percentile(0.99):>8}')
+
+
+def parse_args():
+    parser = ArgumentParser(description='Load tests TeleSession offline against a fake Telegram Bot API')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=5, help='requests sent by every user')
+    parser.add_argument('--mix', default='search=4,get=4,fav=2', help='command weights like search=4,get=4,fav=2')
+    parser.add_argument('--think', type=float, default=1.0, help='mean think time between requests in seconds')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='seconds to start all users over')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds before a request counts as failed')
+    parser.add_argument('--subjects', type=int, default=1000, help='subjects in the fake timetable')
+    parser.add_argument('--refresh', type=float, default=20, help='refresh seconds of the fake timetable source')
+    parser.add_argument('--threads', type=int, default=2, help='worker threads of the bot')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    args.mix = {command: float(weight) for command, weight in
+                (item.split('=') for item in args.mix.split(','))}
+    unknown = set(args.mix) - {'search', 'get', 'fav'}
+    if unknown:
+        parser.error(f'unknown commands in --mix: {", ".join(unknown)}')
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    server = FakeServer(subject_count=args.subjects)
+    server.start()
+
+    # the bot keeps its data relative to the working directory, so it gets a throwaway one
+    work_dir = tempfile.mkdtemp(prefix='edugate_load_test_')
+    chdir(work_dir)
+    makedirs('data', exist_ok=True)
+    with open('data/sources.json', 'w', encoding='utf-8') as file:
+        ujson.dump({'current': {'url': server.timetable_url, 'refresh': args.refresh}}, file)
+
+    from telebot import apihelper
+    from packages.telegram_bot import TeleSession
+    apihelper.API_URL = server.api_url
+
+    print(f'Starting bot against {server}, data in {work_dir} until the test ends')
+    bot = TeleSession('123456:' + 'x' * 40, num_threads=args.threads)
+    bot.start()
+
+    test = LoadTest(server, args.users, args.requests, args.mix, args.think, args.ramp_up, args.timeout, args.seed)
+    try:
+        elapsed = test.run()
+        print(test.report(elapsed))
+    finally:
+        bot.stop()
+        server.stop()
+        chdir(dirname(abspath(__file__)))
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -12,6 +12,21 @@ COMMANDS_LIST = (
 
     f'/fav - Shows the favorite editor, as you may show, add, delete, clear.\n\n'
 
+    f'/find <FIELD:VALUE> ... - Finds sections by teacher, class or status.\n\n'
+
+    f'/free <DAY> <HH-HH> - Lists open sections that fit inside a time window.\n\n'
+
+    f'/stats - Shows how many sections are open, closed and full.\n'
+    f'/stats <ID> - Shows it for one subject only.\n'
+    f'/stats teacher:<NAME> - Shows how many sections a teacher has.\n\n'
+
+    f'/plan - Plans conflict-free timetables of your favorite subjects.\n\n'
+
+    f'/history <ID> <SECTION> - Shows when the section changed and how often it flips.\n\n'
+
+    f'/term - Shows the available terms and campuses.\n'
+    f'/term <NAME> - Uses the timetable of NAME for your commands.\n\n'
+
     f'/suggest - Suggest a feature to be added.\n')
 
 
@@ -23,8 +38,11 @@ SEARCH_ERROR_2 = (
     'Example:\n/search برمجة or /search مهارات -✔\n'
     '/search ب or /search مه -✖\n')
 SEARCH_ERROR_3 = (
-    'Results are too long, please try to search with a more specific subject name.\n\n'
-    'Example:\n/search برمجة instead of /search برم\n')
+    'These results expired, please /search again ⌛')
+SEARCH_PAGE_1F = (
+    '\nPage {} of {}')
+SEARCH_BUTTON_PREV = '◀ Previous'
+SEARCH_BUTTON_NEXT = 'Next ▶'
 SEARCH_LOG_1F = (
     'func={}, searched_for={}')
 
@@ -94,3 +112,131 @@ FAV_LOG_1F = (
     'func={}, type={}, id={}, section={}')
 
 
+HISTORY_ERROR_1M = (
+    'Please enter subject ID and SECTION to get its history\n'
+    '/history ID SECTION\n\n'
+    'ID is a 6 digit number!\n'
+    'SECTION is 2 digits at most!\n\n'
+    'Example:\n'
+    '/history `185103` `1` or /history `183109` `5` ✔\n')
+HISTORY_ERROR_2FM = (
+    '`{}` must be a number with 6 digits 😭!\n\n'
+    'Example:\n'
+    '/history `185103` `1` or /history `183109` `5` ✔\n')
+HISTORY_ERROR_3FM = (
+    '`{}` must be a number with at most 2 digits 🤓!\n\n'
+    'Example:\n'
+    '/history `185103` `1` or /history `183109` `5` ✔\n')
+HISTORY_RESULT_1F = (
+    "No history recorded for {} {} yet 😔!\n")
+HISTORY_LOG_1F = (
+    'func={}, id={}, section={}')
+
+PLAN_ERROR_1 = (
+    'Your favorite list is empty, add the subjects you want to plan first\n\n'
+    'Example:\n'
+    '/fav add 185103 1 then /plan\n')
+PLAN_WAIT_1 = (
+    'Planning your timetables...\n'
+    'Hold your tea! 😀🔥')
+PLAN_RESULT_1F = (
+    'Plan {}: {} days, {} idle minutes, {} closed\n')
+PLAN_RESULT_2 = (
+    'No conflict-free timetable was found for your favorites 😔!\n')
+PLAN_RESULT_3F = (
+    '\nNot found in the timetable: {}\n')
+PLAN_RESULT_4 = (
+    '\nSearch took too long, these are the best plans found so far ⏱\n')
+PLAN_LOG_1F = (
+    'func={}, subjects={}')
+
+FREE_ERROR_1M = (
+    'Please enter a DAY and a time window\n'
+    '/free DAY HH-HH\n\n'
+    'DAY is a day name like Sun or الأحد\n'
+    'HH-HH is the window like 8-12 or 10:00-13:30\n\n'
+    'Example:\n'
+    '/free `Sun` `8-12` or /free `الاثنين` `10-14` ✔\n')
+FREE_ERROR_2FM = (
+    '`{}` is not a day 🤓!\n\n'
+    'Example:\n'
+    '/free `Sun` `8-12` or /free `الاثنين` `10-14` ✔\n')
+FREE_ERROR_3FM = (
+    '`{}` is not a time window 🤓!\n\n'
+    'Example:\n'
+    '/free `Sun` `8-12` or /free `Sun` `10:00-13:30` ✔\n')
+FREE_RESULT_1F = (
+    'No open sections on {} between {} and {} 😔!\n')
+FREE_RESULT_2 = (
+    '\nResults are too long, try a smaller time window.\n')
+FREE_LOG_1F = (
+    'func={}, day={}, window={}')
+
+FIND_ERROR_1M = (
+    'Please enter what to find as FIELD:VALUE\n'
+    '/find FIELD:VALUE FIELD:VALUE ...\n\n'
+    'FIELD is one of teacher, class, room, status\n'
+    'All of the entered fields have to match\n\n'
+    'Example:\n'
+    '/find `teacher:Ahmad status:open` ✔\n'
+    '/find `class:B101` ✔\n')
+FIND_RESULT_1F = (
+    'No sections match "{}" 😔!\n')
+FIND_RESULT_2 = (
+    '\nResults are too long, please add more fields to your search.\n')
+FIND_LOG_1F = (
+    'func={}, query={}')
+
+TERM_LIST_1FM = (
+    'Available timetables:\n'
+    '{}\n'
+    'Use /term NAME to switch\n')
+TERM_ERROR_1FM = (
+    '`{}` is not an available timetable 🤓!\n\n'
+    'Call /term to see the available ones\n')
+TERM_ERROR_2F = (
+    'The {} timetable is not available right now 😔\n'
+    'Please try again later or switch with /term\n')
+TERM_RESULT_1FM = (
+    'Your commands now use the `{}` timetable ✔\n')
+TERM_LOG_1F = (
+    'func={}, from={}, to={}')
+
+PROFILE_ERROR_1 = (
+    'This command is for admins only 🙅')
+PROFILE_ERROR_2M = (
+    'How to use the /profile\n'
+    '`/profile` - Shows the calls left to profile\n'
+    '`/profile` N TARGET - Profiles the next N calls of TARGET\n'
+    '`/profile` N TARGET memory - Also traces memory allocations\n'
+    '`/profile 0` TARGET - Stops profiling TARGET\n\n'
+    'TARGET is handlers or refresh, handlers is the default\n\n'
+    'Example:\n'
+    '`/profile 20` or `/profile 3 refresh memory`\n')
+PROFILE_STATUS_1F = (
+    'Calls left to profile: {}')
+PROFILE_RESULT_1F = (
+    'Profiling the next {} {} calls, dumps are written to {} ⏱')
+PROFILE_LOG_1F = (
+    'func={}, calls={}, target={}, memory={}')
+
+STATS_ERROR_1FM = (
+    '`{}` must be a number with 6 digits 😭!\n\n'
+    'Example:\n'
+    '/stats or /stats `185103` or /stats `teacher:Ahmad` ✔\n')
+STATS_ERROR_2M = (
+    'Please enter the name of the teacher\n'
+    '/stats teacher:NAME\n\n'
+    'Example:\n'
+    '/stats `teacher:Ahmad` ✔\n')
+STATS_RESULT_1FM = (
+    "'{}' doesn't match courses 😔!\n")
+STATS_RESULT_2F = (
+    'No teacher matches "{}" 😔!\n')
+STATS_LOG_1F = (
+    'func={}, id={}')
+STATS_LOG_2F = (
+    'func={}, teacher={}')
+
+REPLY_UNCHANGED_1F = (
+    'Nothing changed since {} ⬆')
@@ -0,0 +1,126 @@
+from time import monotonic
+from typing import Any, Callable, Optional
+from collections import OrderedDict
+import threading
+
+
+class TTLCache:
+    """A thread safe cache whose entries expire after `ttl` seconds
+
+            :param ttl: seconds an entry lives after it is set
+            :param max_size: entries kept at most, the oldest one is evicted first
+
+        Expired entries are dropped when they are read and when a new entry is set
+
+            ~"""
+    def __init__(self, ttl: float, max_size: int=1000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.__entries = OrderedDict()
+        """{key: (expires_at, value)} ordered from the oldest set"""
+        self.__lock = threading.Lock()
+
+    def get(self, key: Any, default: Any=None) -> Any:
+        """Returns the value of `key` or `default` if it is missing or expired"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= monotonic():
+                del self.__entries[key]
+                return default
+            return entry[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        """Sets `key` to `value` and restarts its ttl"""
+        with self.__lock:
+            now = monotonic()
+            self.__entries.pop(key, None)
+            self.__entries[key] = (now + self.ttl, value)
+            # entries are ordered by set time so the expired ones are first
+            while self.__entries:
+                oldest_key, (expires_at, _value) = next(iter(self.__entries.items()))
+                if expires_at > now and len(self.__entries) <= self.max_size:
+                    break
+                del self.__entries[oldest_key]
+
+    def pop(self, key: Any, default: Optional[Any]=None) -> Any:
+        """Removes `key` and returns its value or `default`"""
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            return default if entry is None or entry[0] <= monotonic() else entry[1]
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __repr__(self):
+        return f"TTLCache(len={len(self)}, ttl={self.ttl})"
+
+
+class SizedLRUCache:
+    """A thread safe cache bounded by the total size of its values
+
+            :param max_size: total size of the values kept at most
+            :param sizeof: returns the size of a value, called once when it is set
+
+        When the total goes over `max_size` the least recently used entries are
+        evicted, the entry that was just set is always kept
+
+            ~"""
+    def __init__(self, max_size: int, sizeof: Callable[[Any], int]):
+        self.max_size = max_size
+        self.__sizeof = sizeof
+        self.__entries = OrderedDict()
+        """{key: (size, value)} ordered from the least recently used"""
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+    def get(self, key: Any, default: Any=None) -> Any:
+        """Returns the value of `key` and marks it as recently used"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return default
+            self.__entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Any, value: Any) -> list:
+        """Sets `key` to `value` and returns the keys that were evicted"""
+        size = self.__sizeof(value)
+        evicted = []
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.__size -= old[0]
+            self.__entries[key] = (size, value)
+            self.__size += size
+            while self.__size > self.max_size and len(self.__entries) > 1:
+                oldest_key, (oldest_size, _value) = self.__entries.popitem(last=False)
+                self.__size -= oldest_size
+                evicted.append(oldest_key)
+        return evicted
+
+    def pop(self, key: Any, default: Optional[Any]=None) -> Any:
+        """Removes `key` and returns its value or `default`"""
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is None:
+                return default
+            self.__size -= entry[0]
+            return entry[1]
+
+    def size(self) -> int:
+        """Returns the total size of the kept values"""
+        return self.__size
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.__entries
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __repr__(self):
+        return f"SizedLRUCache(len={len(self)}, size={self.__size}, max_size={self.max_size})"
+
+
+__all__ = ['TTLCache', 'SizedLRUCache']
@@ -1,14 +1,17 @@
 import requests
-from lxml import html
+from lxml import html, etree
 
 from os.path import exists, join
 from typing import Optional
+from sys import getsizeof
 from os import makedirs
 from enum import Enum
 from time import time
 from ujson import dumps
+import re
 
 from .logger import Logger
+from .timeslots import parse_slots, slots_to_mask, IntervalIndex
 
 
 class SUBJECT(Enum):
@@ -21,6 +24,25 @@ class SUBJECT(Enum):
     STATUS = '88'
     TEACHER = '90'
 
+class STATUS(Enum):
+    """ Enums for the state of a section """
+    OPEN = 'open'
+    CLOSED = 'closed'
+    FULL = 'full'
+
+def section_state(status: Optional[str]) -> Optional[STATUS]:
+    """Returns the STATUS of a scraped status text or `None` if it is unknown"""
+    if not status:
+        return None
+    status = status.lower()
+    if 'open' in status or 'مفتوح' in status:
+        return STATUS.OPEN
+    if 'full' in status or 'ممتلئ' in status or 'مكتمل' in status:
+        return STATUS.FULL
+    if 'close' in status or 'مغلق' in status:
+        return STATUS.CLOSED
+    return None
+
 # stores info and its methods
 class Subjects:
     """ Stores the subjects as a dictionary in list """
@@ -32,6 +54,18 @@ class Subjects:
             and each one value is the data about that section
             """
         self.list_last_updated = None
+        self.version = 0
+        """The history version this snapshot matches, set by `SectionHistory.record`"""
+        self.time_slots = {}
+        """{(ID, SECTION): [(DAY, START, END), ...]} the parsed `time` of every section"""
+        self.time_masks = {}
+        """{(ID, SECTION): MASK} the weekly bitmask of every section's `time_slots`"""
+        self.interval_index = IntervalIndex({})
+        """Index of `time_slots` by day and start time"""
+        self.field_index = None
+        """`query.FieldIndex` of the sections by teacher, class and status"""
+        self.parse_report = None
+        """`ParseReport` of the response this snapshot was scraped from"""
         
     
     def get_all_sections_info(self, ID: str) -> Optional[str]:
@@ -147,6 +181,75 @@ class Subjects:
             print(f"An unexpected error occurred: {e}")
             return -4
 
+    def search_by_time(self, day: int, start: int, end: int, only_open: bool=True) -> list:
+        """Finds the sections that have a lecture inside a time window
+
+            - day: index of the day in `timeslots.DAYS`
+            - start, end: the window in minutes since midnight
+            - only_open: skip sections whose status is not open
+
+            -- returns a [(ID, SECTION, START, END)] list ordered by START
+            ~"""
+        found = self.interval_index.query(day, start, end)
+        if only_open:
+            found = [slot for slot in found
+                     if section_state(self.list[slot[0]][slot[1]].get('status')) == STATUS.OPEN]
+        return found
+
+    def build_time_slots(self) -> None:
+        """Parses the `time` of every section into `self.time_slots`,
+            `self.time_masks` and `self.interval_index`, called once the list is scraped"""
+        self.time_slots = {}
+        self.time_masks = {}
+        for ID, sections in self.list.items():
+            for section, data in sections.items():
+                slots = parse_slots(data.get('time', ''))
+                self.time_slots[(ID, section)] = slots
+                self.time_masks[(ID, section)] = slots_to_mask(slots)
+        self.interval_index = IntervalIndex(self.time_slots)
+
+    def build_field_index(self) -> None:
+        """Builds `self.field_index` of the list, called once the list is scraped"""
+        from .query import FieldIndex
+        self.field_index = FieldIndex(self.list)
+
+    def search_by_fields(self, query: str) -> Optional[dict]:
+        """Finds the sections matching a `field:value` query
+
+            - query: terms like `teacher:NAME class:ROOM status:open`
+              all terms must match
+
+            -- returns a {'ID': ['SECTION', ...]} dict of the matches
+            -- returns `None` if the query can not be parsed
+            ~"""
+        if self.field_index is None:
+            self.build_field_index()
+        terms = self.field_index.parse_query(query)
+        if terms is None:
+            return None
+        found_list = {}
+        for ID, section in sorted(self.field_index.query(terms), key=lambda key: (key[0], key[1].zfill(3))):
+            found_list.setdefault(ID, []).append(section)
+        return found_list
+
+    def memory_size(self) -> int:
+        """Returns a rough estimate in bytes of the memory held by the list, its time slots and its indexes"""
+        size = getsizeof(self.list) + getsizeof(self.time_slots) + getsizeof(self.time_masks)
+        for ID, sections in self.list.items():
+            size += getsizeof(ID) + getsizeof(sections)
+            for section, data in sections.items():
+                size += getsizeof(section) + getsizeof(data) + sum(getsizeof(value) for value in data.values())
+        # every (ID, SECTION) key is its own tuple in each dictionary
+        for slot_dict in (self.time_slots, self.time_masks):
+            size += len(slot_dict) * getsizeof(('', ''))
+        for slots in self.time_slots.values():
+            size += getsizeof(slots) + sum(getsizeof(slot) + sum(map(getsizeof, slot)) for slot in slots)
+        size += sum(map(getsizeof, self.time_masks.values()))
+        size += self.interval_index.memory_size()
+        if self.field_index is not None:
+            size += self.field_index.memory_size()
+        return size
+
     def print_to_console(self) -> None:
         """
             This method prints self.list into console:
@@ -166,16 +269,79 @@ class Subjects:
         return f"SubjectsList(len={len(self.list)})"
     
 
+class ParseReport:
+    """What the parse stage of `DataSession` found in one response
+
+        - valid_structure: the response is a JSF partial-response with the timetable update
+        - error: why the structure is not valid
+        - rows: table rows found
+        - valid_rows: rows that had every field and were kept
+        - malformed: `[(ROW, REASON), ...]` the first `MALFORMED_KEPT` rows that were dropped
+        - truncated: the response ended before the document did, its last row is dropped
+        - dropped: `{(ID, SECTION), ...}` the dropped rows that still had an ID and a SECTION
+        - salvaged_sections: sections carried over from the last good snapshot
+        ~"""
+    MALFORMED_KEPT = 20
+
+    def __init__(self):
+        self.valid_structure = False
+        self.error = None
+        self.rows = 0
+        self.valid_rows = 0
+        self.malformed = []
+        self.malformed_count = 0
+        self.truncated = False
+        self.dropped = set()
+        self.salvaged_sections = 0
+
+    @property
+    def complete(self) -> bool:
+        """True if the whole table was parsed without dropping a row"""
+        return self.valid_structure and not self.truncated and not self.malformed_count
+
+    def add_malformed(self, row: str, reason: str, ID: Optional[str]=None, SECTION: Optional[str]=None) -> None:
+        self.malformed_count += 1
+        if ID and SECTION:
+            self.dropped.add((ID, SECTION))
+        if len(self.malformed) < self.MALFORMED_KEPT:
+            self.malformed.append((row, reason))
+
+    def __repr__(self):
+        return (f"ParseReport(valid_structure={self.valid_structure}, error={self.error}, rows={self.rows}, "
+                f"valid_rows={self.valid_rows}, malformed={self.malformed_count}, truncated={self.truncated}, "
+                f"salvaged_sections={self.salvaged_sections})")
+
+
 # handles data gathering
 class DataSession:
     """ 
         Session class that will handle the session and gather the information needed
+
+        Every response goes through a parse stage that checks it is the JSF partial-response
+        of the timetable and drops the rows missing a field, see `ParseReport`.
+        A response that is cut short or has malformed rows keeps its valid sections and takes
+        the rest from the last good snapshot, a response without any valid row is a failed refresh
     """
-    def __init__(self):
+    URL = 'https://edugate.jadara.edu.jo/timetable'
+    TABLE_ID = 'serviceContents:scheduleDtl'
+    LABEL_ID = re.compile(r'^serviceContents:scheduleDtl:(\d+):j_idt(\d+)$')
+    """label ids look like `serviceContents:scheduleDtl:{ROW}:j_idt{CODE}`, see `SUBJECT`"""
+    RAW_TABLE = re.compile(rb'<update id="serviceContents:scheduleDtl">\s*<!\[CDATA\[(.*?)(?:\]\]>|$)', re.DOTALL)
+    """the timetable update read without the XML parser, for responses it can not parse"""
+    XML_PARSER = etree.XMLParser(huge_tree=True)
+    """a term can be more than the 10MB libxml2 allows by default"""
+
+    def __init__(self, url: Optional[str]=None, name: Optional[str]=None):
+        """
+            - url: the timetable page to scrape, defaults to `DataSession.URL`
+            - name: the name of the timetable source, used in the logger name
+        """
         self.__response = None
-        self.__logger = Logger(self.__class__.__name__)
+        self.__logger = Logger(f'{self.__class__.__name__}_{name}' if name else self.__class__.__name__)
         self.__session = requests.Session()
-        self.__url = 'https://edugate.jadara.edu.jo/timetable'
+        self.__url = url or self.URL
+        self.__last_good = None
+        """The last snapshot this session returned, missing sections are salvaged from it"""
         
     def run(self) -> Optional[Subjects]:
         """Handles all of the logic of sending the get 
@@ -186,7 +352,10 @@ class DataSession:
 
 
             - On success returns Subjects() object and None on fail"""
-        self.__payload = self._create_data(self._get_viewstate())
+        viewstate = self._get_viewstate()
+        if viewstate is None:
+            return None
+        self.__payload = self._create_data(viewstate)
         return self._update()
 
     def close(self) -> None:
@@ -199,8 +368,37 @@ class DataSession:
         if not is_success:
             return None
         subjects = self._scrape_data()
+        report = subjects.parse_report
+        if not report.valid_structure or not report.valid_rows:
+            self.__logger.error(f'Parse failed, keeping the last snapshot. {report}, malformed={report.malformed}')
+            return None
+        if self.__last_good and (report.truncated or report.dropped):
+            # the rows after a cut are unknown, a complete response only lost its dropped rows
+            self.__salvage(subjects, self.__last_good, None if report.truncated else report.dropped)
+        if report.complete:
+            self.__logger.info(f'Parse success. {report}')
+        else:
+            self.__logger.error(f'Parse partial. {report}, malformed={report.malformed}')
+        subjects.build_time_slots()
+        subjects.build_field_index()
+        subjects.last_update = time()
         subjects.list_last_updated = time()
+        self.__last_good = subjects
         return subjects
+
+    @staticmethod
+    def __salvage(subjects: Subjects, last_good: Subjects, keys: Optional[set]=None) -> None:
+        """Adds the sections of `last_good` that are missing from `subjects`
+
+            - keys: `{(ID, SECTION), ...}` only these sections are added, all of them if `None`
+            ~"""
+        if keys is None:
+            keys = ((ID, section) for ID, sections in last_good.list.items() for section in sections)
+        for ID, section in keys:
+            data = last_good.list.get(ID, {}).get(section)
+            if data is not None and section not in subjects.list.get(ID, {}):
+                subjects.list.setdefault(ID, {})[section] = dict(data)
+                subjects.parse_report.salvaged_sections += 1
         
     def _get_viewstate(self) -> str:
         """
@@ -208,10 +406,18 @@ class DataSession:
             changed for every session
 
             - This makes sure to get it in the current page 
-            - Returns viewstate value
+            - Returns viewstate value or None if the page does not have it
         """
         response = self.__session.get(self.__url)
-        viewstate = html.fromstring(response.content).xpath("//input[@name='javax.faces.ViewState']/@value")[0]
+        viewstate = None
+        if response.status_code == 200 and response.content:
+            viewstate = next(iter(html.fromstring(response.content).xpath("//input[@name='javax.faces.ViewState']/@value")), None)
+        if viewstate is None:
+            self.__logger.error('ViewState retrieval failed. status={}, len(response)={}, time={}'.format(
+                response.status_code,
+                len(response.content),
+                response.elapsed
+            ))
         return viewstate
     
     def _create_data(self, viewstate: str) -> dict:
@@ -245,7 +451,8 @@ class DataSession:
             - Returns True on success and False on fail"""
         self.__response = self.__session.post(self.__url, data=self.__payload)
         
-        if len(self.__response.text) < 1000000: 
+        # the size of the timetable changes every term, the parse stage checks the content
+        if self.__response.status_code != 200 or not self.__response.content: 
             self.__logger.error('Data retrieval failed. status={}, len(response)={}, time={}'.format(
                 self.__response.status_code, 
                 len(self.__response.text),
@@ -266,63 +473,98 @@ class DataSession:
 
             - MUST NOT TRIGGER IF _send_post IS FAIL
 
-            - Returns Subjects() object
+            - Returns Subjects() object, its `parse_report` tells what was kept and dropped
         """
-        all_labels = html.fromstring(self.__response.content).xpath("//label")
-        
         subjects = Subjects()
         """
             dictionary format subjects.list['SUBJECT_ID']['SECTION']['name', 'time', 'class', 'status', 'teacher']
             SUBJECT_ID = str(NUMBER), whose length is 6
             SECTION = str(NUMBER)
         """
-
-        temp_info = {}
-        current_id = None
-        current_section = None
-        
-        for label in all_labels:
-            # getting the identifier and info ready 
-            identifier: str = label.get('id')[28:]
-            identifier = identifier[0:identifier.find(':')] + identifier[-2:]
-            """
-                identifier format : f'{int}{TWO_NUMBERS}'
-                TWO_NUMBERS = ['76','78','82','84','86','88','90']
-            """
-            info = label.text_content().strip()
-            """
-                info indicates a specific value for each number in 
-                TWO_NUMBERS all belonging to the same int number
-            """
-            
-            # logic of inserting data into the dictionary called subjects_list
-            if identifier[-2:] == SUBJECT.ID.value:
-                if current_section:
-                    subjects.list[current_id][current_section] = temp_info
-                    temp_info = {} 
-                current_id = info
-                if current_id not in subjects.list:
-                    subjects.list[current_id] = {}
-            elif identifier[-2:] == SUBJECT.SECTION.value:
-                current_section = info
-                if current_id:
-                    subjects.list[current_id][current_section] = temp_info
-            else:  
-                if identifier[-2:] == SUBJECT.NAME.value:
-                    temp_info['name'] = info
-                elif identifier[-2:] == SUBJECT.TIME.value:
-                    temp_info['time'] = info
-                elif identifier[-2:] == SUBJECT.CLASS.value:
-                    temp_info['class'] = info
-                elif identifier[-2:] == SUBJECT.STATUS.value:
-                    temp_info['status'] = info
-                elif identifier[-2:] == SUBJECT.TEACHER.value:
-                    temp_info['teacher'] = info
-        if current_id and current_section:
-            subjects.list[current_id][current_section] = temp_info
-        subjects.last_update = time()
+        report = subjects.parse_report = ParseReport()
+        table = self.__table_content(report)
+        if table is None:
+            return subjects
+
+        rows = {}
+        """{'ROW': {'CODE': INFO}} the labels of every table row"""
+        for label in html.fromstring(table).iter('label'):
+            match = self.LABEL_ID.match(label.get('id') or '')
+            if match:
+                row, code = match.groups()
+                rows.setdefault(row, {})[code[-2:]] = label.text_content().strip()
+
+        report.rows = len(rows)
+        if report.truncated and rows:
+            # the cut may be inside the last row's labels, a value cut short looks valid
+            row, labels = rows.popitem()
+            report.add_malformed(row, 'cut short', labels.get(SUBJECT.ID.value), labels.get(SUBJECT.SECTION.value))
+        fields = (SUBJECT.NAME, SUBJECT.TIME, SUBJECT.CLASS, SUBJECT.STATUS, SUBJECT.TEACHER)
+        for row, labels in rows.items():
+            missing = [field.name for field in SUBJECT if field.value not in labels]
+            ID, SECTION = labels.get(SUBJECT.ID.value), labels.get(SUBJECT.SECTION.value)
+            if missing:
+                report.add_malformed(row, f"missing {', '.join(missing)}", ID, SECTION)
+            elif not (ID.isdigit() and len(ID) == 6):
+                report.add_malformed(row, f'bad ID {ID!r}')
+            elif not SECTION.isdigit():
+                report.add_malformed(row, f'bad SECTION {SECTION!r}')
+            elif not labels[SUBJECT.NAME.value]:
+                report.add_malformed(row, 'empty NAME', ID, SECTION)
+            else:
+                subjects.list.setdefault(ID, {})[SECTION] = {
+                    field.name.lower(): labels[field.value] for field in fields
+                }
+                report.valid_rows += 1
         return subjects
 
+    def __table_content(self, report: ParseReport) -> Optional[str]:
+        """Checks the response is a JSF partial-response and returns the HTML of the timetable update
+
+            - Sets `report.valid_structure`, `report.error` and `report.truncated`
+            - Returns `None` if the structure is not valid
+            ~"""
+        content = self.__response.content
+        recovered = False
+        try:
+            root = etree.fromstring(content, self.XML_PARSER)
+        except etree.XMLSyntaxError as e:
+            # a response cut short still has the rows before the cut, the recovering parser keeps them
+            recovered = True
+            report.truncated = not content.rstrip().endswith(b'</partial-response>')
+            root = etree.fromstring(content, etree.XMLParser(recover=True, huge_tree=True))
+            if root is None:
+                report.error = f'not XML: {e}'
+                return None
+
+        if root.tag != 'partial-response':
+            report.error = f'root is <{root.tag}> not <partial-response>'
+            return None
+        error = root.find('error')
+        if error is not None:
+            report.error = f"server error: {error.findtext('error-name')}: {error.findtext('error-message')}"
+            return None
+        redirect = root.find('redirect')
+        if redirect is not None:
+            report.error = f"redirected to {redirect.get('url')}"
+            return None
+
+        updates = root.findall('changes/update')
+        table = next((update.text for update in updates if update.get('id') == self.TABLE_ID), None)
+        if table is None:
+            # the table may be rendered under a parent id, take the update that has its labels
+            table = next((update.text for update in updates if update.text and f'{self.TABLE_ID}:' in update.text), None)
+        if not table and recovered:
+            # the recovering parser drops a CDATA section that is cut short, it is read as it is
+            match = self.RAW_TABLE.search(content)
+            table = match and match.group(1).decode('utf-8', 'ignore')
+        if not table:
+            report.error = f'no update of {self.TABLE_ID}'
+            return None
+        report.valid_structure = True
+        # parsed as text, bytes without a charset would be read as Latin-1
+        return table
+
 
 
-__all__ = ['dataSession', 'Subjects']
\ No newline at end of file
+__all__ = ['dataSession', 'Subjects', 'STATUS', 'section_state', 'ParseReport']
\ No newline at end of file
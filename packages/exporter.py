@@ -0,0 +1,198 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+from typing import Iterator, Optional
+import ujson
+
+from .data_handler import Subjects
+from .history import SectionHistory
+
+
+COLUMNS = ('id', 'section', 'name', 'time', 'class', 'status', 'teacher')
+""" Columns of every exported row, in order """
+CHANGE_COLUMN = 'change'
+""" Extra column of delta exports, one of `added`, `changed`, `removed` """
+
+FORMATS = ('jsonl', 'csv', 'col')
+COMPRESSIONS = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+COLUMNAR_MAGIC = b'EGCOL1'
+COLUMNAR_GROUP_ROWS = 1024
+""" Rows buffered per row group of the columnar format """
+
+
+def iter_rows(subjects: Subjects, since: Optional[int]=None, history: Optional[SectionHistory]=None) -> Iterator[tuple]:
+    """Yields the sections of a snapshot as rows of `COLUMNS`
+
+        - since: only yield the sections that changed after this history version,
+          rows then end with a `CHANGE_COLUMN` value, `history` is required
+        ~"""
+    if since is None:
+        for ID, sections in subjects.list.items():
+            for section, data in sections.items():
+                yield (ID, section, *(data.get(column, '') for column in COLUMNS[2:]))
+        return
+
+    for ID, section in sorted(history.changed_since(since)):
+        data = subjects.list.get(ID, {}).get(section)
+        if data is None:
+            yield (ID, section, *('' for _column in COLUMNS[2:]), 'removed')
+            continue
+        change = 'added' if history.get(ID, section)[0][0] > since else 'changed'
+        yield (ID, section, *(data.get(column, '') for column in COLUMNS[2:]), change)
+
+
+def export(subjects: Subjects, file_path: str, file_format: str='jsonl', compression: Optional[str]=None,
+           since: Optional[int]=None, history: Optional[SectionHistory]=None) -> int:
+    """Streams a snapshot into a file row by row
+
+        - file_format: one of `FORMATS`
+        -- jsonl: one JSON object per section
+        -- csv: a header row then one row per section
+        -- col: columnar binary, see `write_columnar`
+        - compression: one of `COMPRESSIONS` or `None`
+        - since, history: export only the changes after a history version, see `iter_rows`
+
+        -- returns the number of exported rows
+        ~"""
+    if file_format not in FORMATS:
+        raise ValueError(f'Unknown format {file_format}, use one of {", ".join(FORMATS)}')
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f'Unknown compression {compression}, use one of {", ".join(COMPRESSIONS)}')
+    if since is not None and history is None:
+        raise ValueError('A history is required to export the changes since a version')
+
+    columns = COLUMNS if since is None else (*COLUMNS, CHANGE_COLUMN)
+    rows = iter_rows(subjects, since, history)
+    opener = COMPRESSIONS.get(compression, open)
+    with opener(file_path, 'wb') as file:
+        if file_format == 'col':
+            return write_columnar(file, columns, rows)
+        text_file = io.TextIOWrapper(file, encoding='utf-8', newline='')
+        try:
+            if file_format == 'jsonl':
+                return write_jsonl(text_file, columns, rows)
+            return write_csv(text_file, columns, rows)
+        finally:
+            text_file.flush()
+            text_file.detach()
+
+
+def write_jsonl(file, columns: tuple, rows: Iterator[tuple]) -> int:
+    """Writes every row as a JSON object line, returns the number of rows"""
+    count = 0
+    for row in rows:
+        file.write(ujson.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def write_csv(file, columns: tuple, rows: Iterator[tuple]) -> int:
+    """Writes a header then every row as CSV, returns the number of rows"""
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_columnar(file, columns: tuple, rows: Iterator[tuple]) -> int:
+    """Writes the rows in a compact columnar binary format, returns the number of rows
+
+        Layout, every number is an unsigned LEB128 varint and every string is its
+        UTF-8 length followed by its bytes:
+        - `COLUMNAR_MAGIC`, column count, column names
+        - row groups of at most `COLUMNAR_GROUP_ROWS` rows, each one is its row count
+          then for every column its distinct values followed by one value index per row
+        - a row count of 0 ends the file
+
+        Only one row group is held in memory at a time
+        ~"""
+    file.write(COLUMNAR_MAGIC)
+    file.write(_varint(len(columns)))
+    for column in columns:
+        file.write(_string(column))
+
+    count = 0
+    group = []
+    for row in rows:
+        group.append(row)
+        if len(group) == COLUMNAR_GROUP_ROWS:
+            file.write(_row_group(columns, group))
+            count += len(group)
+            group = []
+    if group:
+        file.write(_row_group(columns, group))
+        count += len(group)
+    file.write(_varint(0))
+    return count
+
+
+def read_columnar(file) -> Iterator[dict]:
+    """Yields the rows of a file written by `write_columnar` as dicts, one row group at a time"""
+    if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError('Not a columnar export file')
+    columns = [_read_string(file) for _ in range(_read_varint(file))]
+    while (row_count := _read_varint(file)):
+        values = []
+        for _column in columns:
+            distinct = [_read_string(file) for _ in range(_read_varint(file))]
+            values.append([distinct[_read_varint(file)] for _ in range(row_count)])
+        for row in zip(*values):
+            yield dict(zip(columns, row))
+
+
+def _row_group(columns: tuple, group: list) -> bytes:
+    buffer = bytearray(_varint(len(group)))
+    for position in range(len(columns)):
+        distinct = {}
+        indexes = bytearray()
+        for row in group:
+            indexes += _varint(distinct.setdefault(str(row[position]), len(distinct)))
+        buffer += _varint(len(distinct))
+        for value in distinct:
+            buffer += _string(value)
+        buffer += indexes
+    return bytes(buffer)
+
+
+def _varint(number: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte = number & 0x7F
+        number >>= 7
+        if number:
+            encoded.append(byte | 0x80)
+        else:
+            encoded.append(byte)
+            return bytes(encoded)
+
+
+def _string(value: str) -> bytes:
+    encoded = value.encode('utf-8')
+    return _varint(len(encoded)) + encoded
+
+
+def _read_varint(file) -> int:
+    number = 0
+    shift = 0
+    while True:
+        byte = file.read(1)
+        if not byte:
+            raise ValueError('Unexpected end of columnar export file')
+        number |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            return number
+        shift += 7
+
+
+def _read_string(file) -> str:
+    return file.read(_read_varint(file)).decode('utf-8')
+
+
+__all__ = ['COLUMNS', 'FORMATS', 'COMPRESSIONS', 'iter_rows', 'export',
+           'write_jsonl', 'write_csv', 'write_columnar', 'read_columnar']
@@ -0,0 +1,161 @@
+from os.path import exists
+from typing import Optional
+from time import time, localtime, strftime
+import threading
+import ujson
+
+from .data_handler import Subjects, STATUS, section_state
+
+
+class SectionHistory:
+    """Stores the changes of every section across refreshes as deltas
+
+            :param file_path: JSON lines file to persist the deltas at, nothing is saved if `None`
+            :param read_only: only load `file_path`, the versions recorded after it stay in memory
+
+        Only the fields in `TRACKED` are followed, every refresh that changes
+        at least one of them creates a new `version`. The deltas are indexed
+        by `(ID, SECTION)` so a section's history never needs a full scan.
+
+        - A new section is stored as `None -> value` for each tracked field
+        - A removed section is stored as `value -> None` for each tracked field
+
+            ~"""
+    TRACKED = ('status', 'class', 'time', 'teacher')
+
+    def __init__(self, file_path: Optional[str]=None, read_only: bool=False):
+        self.version = 0
+        self.__file_path = file_path
+        self.__read_only = read_only
+        self.__lock = threading.Lock()
+        self.__latest = {}
+        """{(ID, SECTION): {field: value}} the last known value of every tracked field"""
+        self.__changes = {}
+        """{(ID, SECTION): [(version, timestamp, field, old, new), ...]} ordered by version"""
+        self.__versions = {}
+        """{version: timestamp} when each version was recorded"""
+
+        if file_path and exists(file_path):
+            self.__load()
+
+    def record(self, subjects: Subjects) -> list:
+        """Compares `subjects` with the last recorded snapshot and stores the differences
+
+            - Sets `subjects.version` to the version it matches
+            - Returns a list of `(ID, SECTION, field, old, new)` changes, empty if nothing changed
+            ~"""
+        with self.__lock:
+            changes = self.diff(subjects)
+            if changes:
+                self.__apply(self.version + 1, time(), changes)
+                self.__save(changes)
+            subjects.version = self.version
+            return changes
+
+    def diff(self, subjects: Subjects) -> list:
+        """Returns the `(ID, SECTION, field, old, new)` changes between
+            the last recorded snapshot and `subjects` without recording them"""
+        changes = []
+        seen = set()
+        for ID, sections in subjects.list.items():
+            for section, data in sections.items():
+                key = (ID, section)
+                seen.add(key)
+                last = self.__latest.get(key, {})
+                for field in self.TRACKED:
+                    new = data.get(field)
+                    old = last.get(field)
+                    if old != new:
+                        changes.append((ID, section, field, old, new))
+        for key, last in self.__latest.items():
+            if key in seen:
+                continue
+            for field in self.TRACKED:
+                if last.get(field) is not None:
+                    changes.append((*key, field, last[field], None))
+        return changes
+
+    def get(self, ID: str, SECTION: str, field: Optional[str]=None) -> list:
+        """Returns the `(version, timestamp, field, old, new)` changes of a section,
+            only the changes of `field` if given"""
+        changes = self.__changes.get((str(ID), str(SECTION)), [])
+        if field is None:
+            return list(changes)
+        return [change for change in changes if change[2] == field]
+
+    def last_opened(self, ID: str, SECTION: str) -> Optional[float]:
+        """Returns the timestamp of the last time the section became open or `None`"""
+        for _version, timestamp, field, old, new in reversed(self.get(ID, SECTION, 'status')):
+            if section_state(new) == STATUS.OPEN and section_state(old) != STATUS.OPEN:
+                return timestamp
+        return None
+
+    def flip_count(self, ID: str, SECTION: str) -> int:
+        """Returns how many times the status of the section changed after it was first seen"""
+        return sum(1 for change in self.get(ID, SECTION, 'status') if change[3] is not None and change[4] is not None)
+
+    def changed_since(self, version: int) -> set:
+        """Returns the `(ID, SECTION)` keys that changed after `version`"""
+        return {key for key, changes in self.__changes.items() if changes[-1][0] > version}
+
+    def get_history_info(self, ID: str, SECTION: str, limit: int=10) -> Optional[str]:
+        """Gets the history of the entered SECTION of the entered ID
+
+            - Returns a `string` or `None` if the section was never recorded
+            ### String example
+            >>> 'ID SECTION\\n'
+            >>> 'Last opened: DATE, Status flips: COUNT\\n\\n'
+            >>> 'DATE, FIELD: OLD -> NEW\\n'
+            ~"""
+        changes = self.get(ID, SECTION)
+        if not changes:
+            return None
+        last_opened = self.last_opened(ID, SECTION)
+        info = (f"{ID} {SECTION}\n"
+                f"Last opened: {self.__format_time(last_opened) if last_opened else 'Never'}, "
+                f"Status flips: {self.flip_count(ID, SECTION)}\n\n")
+        for _version, timestamp, field, old, new in changes[-limit:]:
+            info += f"{self.__format_time(timestamp)}, {field}: {old or '-'} -> {new or '-'}\n"
+        return info
+
+    def __apply(self, version: int, timestamp: float, changes: list) -> None:
+        """Applies the changes of a version to the in-memory indexes"""
+        self.version = version
+        self.__versions[version] = timestamp
+        for ID, section, field, old, new in changes:
+            key = (ID, section)
+            self.__changes.setdefault(key, []).append((version, timestamp, field, old, new))
+            latest = self.__latest.setdefault(key, {})
+            if new is None:
+                latest.pop(field, None)
+                if not latest:
+                    del self.__latest[key]
+            else:
+                latest[field] = new
+
+    def __save(self, changes: list) -> None:
+        """Appends the last version to the history file"""
+        if not self.__file_path or self.__read_only:
+            return
+        line = {'v': self.version, 't': self.__versions[self.version], 'c': changes}
+        with open(self.__file_path, 'a', encoding='utf-8') as file:
+            file.write(ujson.dumps(line, ensure_ascii=False) + '\n')
+
+    def __load(self) -> None:
+        """Replays the history file into memory"""
+        with open(self.__file_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = ujson.loads(line)
+                self.__apply(entry['v'], entry['t'], [tuple(change) for change in entry['c']])
+
+    @staticmethod
+    def __format_time(timestamp: float) -> str:
+        return strftime('%d-%b %H:%M', localtime(timestamp))
+
+    def __repr__(self):
+        return f"SectionHistory(version={self.version}, sections={len(self.__changes)})"
+
+
+__all__ = ['SectionHistory']
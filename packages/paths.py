@@ -5,8 +5,12 @@ from os.path import exists
 
 env = 'data/telegram_bot.env'
 fav = 'data/favorites.json'
+history = 'data/history.jsonl'
+sources = 'data/sources.json'
+user_sources = 'data/user_sources.json'
 infologs_folder = 'data/logs'
 userlogs_folder = 'data/logs/user_logs'
+profiles_folder = 'data/logs/profiles'
 
 # creating dirs if not exist
 makedirs(infologs_folder, exist_ok=True)
@@ -14,7 +18,16 @@ makedirs(userlogs_folder, exist_ok=True)
 
 if not exists(env):
     with open(env, 'w') as file:
-        file.write('TELE_TOKEN=\n')
+        file.write('TELE_TOKEN=\n'
+                   'ADMIN_IDS=\n')
 if not exists(fav):
     with open(fav, 'w') as file:
+        file.write('{}')
+if not exists(sources):
+    with open(sources, 'w') as file:
+        file.write('{\n'
+                   '    "current": {"url": "https://edugate.jadara.edu.jo/timetable", "refresh": 20}\n'
+                   '}\n')
+if not exists(user_sources):
+    with open(user_sources, 'w') as file:
         file.write('{}')
\ No newline at end of file
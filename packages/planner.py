@@ -0,0 +1,154 @@
+from time import perf_counter
+from typing import Optional
+import heapq
+
+from .data_handler import Subjects, STATUS, section_state
+from .timeslots import DAYS, SLOTS_PER_DAY, SLOT_MINUTES, day_mask
+
+
+_DAY_MASKS = tuple(day_mask(day) for day in range(len(DAYS)))
+
+
+class Timetable:
+    """A conflict-free choice of one section group for every planned subject
+
+            :param choices: `[(ID, [SECTIONS]), ...]` the sections in a group share the same time and state
+            :param mask: the weekly bitmask of the whole timetable
+            :param closed: how many subjects have no open section in their group
+
+        Timetables are ranked by `score`, lower is better:
+        closed subjects first, then days on campus, then idle minutes between lectures
+
+            ~"""
+    def __init__(self, choices: list, mask: int, closed: int):
+        self.choices = choices
+        self.mask = mask
+        self.closed = closed
+        self.days = 0
+        self.idle = 0
+        for day, day_bits in enumerate(_DAY_MASKS):
+            bits = (mask & day_bits) >> (day * SLOTS_PER_DAY)
+            if not bits:
+                continue
+            self.days += 1
+            span = bits.bit_length() - ((bits & -bits).bit_length() - 1)
+            self.idle += (span - bits.bit_count()) * SLOT_MINUTES
+        self.score = (self.closed, self.days, self.idle)
+
+    def __repr__(self):
+        return f"Timetable(score={self.score}, choices={self.choices})"
+
+
+class Planner:
+    """Enumerates conflict-free section combinations of subjects
+
+            :param subjects: the snapshot to plan from, its `time_masks` must be built
+            :param limit: how many timetables to return at most
+            :param budget: the time limit of a search in seconds
+
+        The search is a backtracking over the subjects with the fewest options first,
+        overlaps are tested with the weekly bitmasks of `Subjects.time_masks`.
+        Sections of a subject with the same time and state are searched once as a group,
+        a branch is pruned when a remaining subject has no free option left or when it can
+        not beat the worst kept timetable.
+
+            ~"""
+    def __init__(self, subjects: Subjects, limit: int=3, budget: float=0.5):
+        self.__subjects = subjects
+        self.limit = limit
+        self.budget = budget
+
+    def plan(self, subject_ids: list) -> tuple:
+        """Plans the timetables of `subject_ids`
+
+            - Returns `(timetables, missing, complete)`
+            -- timetables: list of `Timetable` best first
+            -- missing: subject IDs that are not in the snapshot
+            -- complete: False if the budget ran out before the search ended
+            ~"""
+        options = []
+        missing = []
+        for ID in dict.fromkeys(map(str, subject_ids)):
+            groups = self.__group_sections(ID)
+            if groups is None:
+                missing.append(ID)
+            else:
+                options.append((ID, groups))
+        if not options:
+            return [], missing, True
+        # fewest options first to fail as early as possible
+        options.sort(key=lambda option: len(option[1]))
+
+        self.__options = options
+        self.__best = []
+        self.__counter = 0
+        self.__deadline = perf_counter() + self.budget
+        self.__timed_out = False
+        self.__search(0, 0, 0, [])
+
+        timetables = [timetable for _score, _count, timetable in sorted(self.__best, reverse=True)]
+        return timetables, missing, not self.__timed_out
+
+    def __group_sections(self, ID: str) -> Optional[list]:
+        """Returns `[(MASK, IS_CLOSED, [SECTIONS]), ...]` of a subject open groups first,
+            or `None` if the subject is not found"""
+        if ID not in self.__subjects.list:
+            return None
+        groups = {}
+        for section, data in self.__subjects.list[ID].items():
+            mask = self.__subjects.time_masks.get((ID, section), 0)
+            is_closed = section_state(data.get('status')) != STATUS.OPEN
+            groups.setdefault((mask, is_closed), []).append(section)
+        return sorted(((mask, is_closed, sections) for (mask, is_closed), sections in groups.items()),
+                      key=lambda group: (group[1], group[0].bit_count()))
+
+    def __search(self, depth: int, used: int, closed: int, choices: list) -> None:
+        if self.__timed_out or perf_counter() > self.__deadline:
+            self.__timed_out = True
+            return
+        if depth == len(self.__options):
+            self.__keep(Timetable(list(choices), used, closed))
+            return
+        if not self.__can_improve(closed, used):
+            return
+
+        ID, groups = self.__options[depth]
+        for mask, is_closed, sections in groups:
+            if mask & used:
+                continue
+            new_used = used | mask
+            if not self.__has_room(depth + 1, new_used):
+                continue
+            choices.append((ID, sections))
+            self.__search(depth + 1, new_used, closed + is_closed, choices)
+            choices.pop()
+
+    def __has_room(self, depth: int, used: int) -> bool:
+        """Checks that every subject after `depth` still has a free group"""
+        for _ID, groups in self.__options[depth:]:
+            if all(mask & used for mask, _is_closed, _sections in groups):
+                return False
+        return True
+
+    def __can_improve(self, closed: int, used: int) -> bool:
+        """Closed subjects and days on campus only grow deeper in the search,
+            so a branch that can not beat the worst kept timetable is skipped"""
+        if len(self.__best) < self.limit:
+            return True
+        days = sum(1 for day_bits in _DAY_MASKS if used & day_bits)
+        return (closed, days, 0) < self.__best[0][2].score
+
+    def __keep(self, timetable: Timetable) -> None:
+        """Keeps the `limit` best timetables in a max-heap of their scores"""
+        self.__counter += 1
+        item = (tuple(-value for value in timetable.score), self.__counter, timetable)
+        if len(self.__best) < self.limit:
+            heapq.heappush(self.__best, item)
+        elif timetable.score < self.__best[0][2].score:
+            heapq.heapreplace(self.__best, item)
+
+    def __repr__(self):
+        return f"Planner(limit={self.limit}, budget={self.budget})"
+
+
+__all__ = ['Planner', 'Timetable']
@@ -0,0 +1,130 @@
+from functools import wraps
+from os import makedirs
+from os.path import join
+from typing import Callable, Optional
+from time import strftime, perf_counter
+import cProfile
+import pstats
+import io
+import threading
+import tracemalloc
+
+from .logger import Logger
+
+
+class Profiler:
+    """Profiles the next calls of wrapped functions when an admin arms it
+
+            :param folder: folder to write the profile dumps and summaries at
+            :param logs_folder: folder of the profiler's log file
+            :param top: hotspots listed in every summary
+
+        Functions are wrapped once with `wrap(target, func)`, while nothing is armed
+        a wrapped call only checks one flag before calling the function.
+        `arm(calls, target)` profiles the next `calls` calls of that target with cProfile,
+        and tracemalloc if `memory` is True, then writes for every call:
+        - `TIMESTAMP_COUNT_TARGET_NAME.prof` a cProfile dump, open it with `pstats` or snakeviz
+        - `TIMESTAMP_COUNT_TARGET_NAME.txt` the top cumulative hotspots and allocations
+        and logs the summary to `profiles.log`.
+        Profiled calls run one at a time, concurrent calls run without profiling
+
+            ~"""
+    TARGETS = ('handlers', 'refresh')
+
+    def __init__(self, folder: str, logs_folder: str, top: int=20):
+        self.armed = False
+        self.folder = folder
+        self.top = top
+        self.__remaining = {target: 0 for target in self.TARGETS}
+        self.__memory = False
+        self.__count = 0
+        self.__lock = threading.Lock()
+        self.__running = threading.Lock()
+        self.__logger = Logger(self.__class__.__name__, 'profiles.log', logs_folder)
+        makedirs(folder, exist_ok=True)
+
+    def arm(self, calls: int, target: str='handlers', memory: bool=False) -> None:
+        """Profiles the next `calls` calls of `target`, 0 disarms it"""
+        if target not in self.TARGETS:
+            raise ValueError(f'Unknown target {target}, use one of {", ".join(self.TARGETS)}')
+        with self.__lock:
+            self.__remaining[target] = max(calls, 0)
+            self.__memory = memory
+            self.armed = any(self.__remaining.values())
+        self.__logger.info(f'armed target={target}, calls={calls}, memory={memory}')
+
+    def remaining(self) -> dict:
+        """Returns `{target: calls}` still to be profiled"""
+        return dict(self.__remaining)
+
+    def wrap(self, target: str, func: Callable, name: Optional[str]=None) -> Callable:
+        """Returns `func` wrapped so it is profiled while `target` is armed"""
+        name = name or func.__name__.strip('_')
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.armed:
+                return func(*args, **kwargs)
+            return self.__call(target, name, func, args, kwargs)
+        return wrapper
+
+    def __take(self, target: str) -> Optional[tuple]:
+        """Takes one of the remaining calls of `target` if no other call is profiled
+
+            - Returns `(COUNT, MEMORY)` of the taken call or `None`"""
+        with self.__lock:
+            if not self.__remaining[target] or not self.__running.acquire(blocking=False):
+                return None
+            self.__remaining[target] -= 1
+            self.__count += 1
+            self.armed = any(self.__remaining.values())
+            return self.__count, self.__memory
+
+    def __call(self, target: str, name: str, func: Callable, args: tuple, kwargs: dict):
+        if (taken := self.__take(target)) is None:
+            return func(*args, **kwargs)
+        count, memory = taken
+        profile = cProfile.Profile()
+        try:
+            if memory:
+                tracemalloc.start()
+            start = perf_counter()
+            profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                elapsed = perf_counter() - start
+                snapshot = tracemalloc.take_snapshot() if memory else None
+                if memory:
+                    tracemalloc.stop()
+                self.__write(f'{count:04}_{target}_{name}', elapsed, profile, snapshot)
+        finally:
+            self.__running.release()
+
+    def __write(self, label: str, elapsed: float, profile: cProfile.Profile,
+                snapshot: Optional[tracemalloc.Snapshot]) -> None:
+        """Writes the dump and the summary of a profiled call"""
+        try:
+            file_name = join(self.folder, f"{strftime('%Y%m%d-%H%M%S')}_{label}")
+            profile.dump_stats(f'{file_name}.prof')
+
+            summary = io.StringIO()
+            summary.write(f'{label} took {elapsed * 1000:.1f}ms\n\n')
+            pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+            if snapshot is not None:
+                summary.write('Top allocations:\n')
+                for stat in snapshot.statistics('lineno')[:self.top]:
+                    summary.write(f'{stat}\n')
+            with open(f'{file_name}.txt', 'w', encoding='utf-8') as file:
+                file.write(summary.getvalue())
+            self.__logger.info(f'profiled {label}, elapsed={elapsed * 1000:.1f}ms, dump={file_name}.prof\n'
+                               + summary.getvalue())
+        except Exception as e:
+            self.__logger.exception(f'Func={self.__write.__name__}, Error: {e}')
+
+    def __repr__(self):
+        return f"Profiler(armed={self.armed}, remaining={self.__remaining})"
+
+
+__all__ = ['Profiler']
@@ -0,0 +1,106 @@
+from typing import Optional
+from sys import getsizeof
+
+from .data_handler import section_state
+
+
+class FieldIndex:
+    """Secondary indexes of a snapshot on `teacher`, `class` and `status`
+
+            :param subjects_list: the `Subjects.list` dictionary to index
+
+        Every index maps a lowercased value to the set of `(ID, SECTION)` keys
+        that have it, `status` is indexed by its `STATUS` value.
+        A query intersects the sets of its terms, the smallest set first
+
+            ~"""
+    FIELDS = {'teacher': 'teacher', 'class': 'class', 'room': 'class', 'status': 'status'}
+    """ {'QUERY_FIELD': 'SECTION_FIELD'} the fields a query may use """
+
+    def __init__(self, subjects_list: dict):
+        self.__indexes = {'teacher': {}, 'class': {}, 'status': {}}
+        for ID, sections in subjects_list.items():
+            for section, data in sections.items():
+                key = (ID, section)
+                for field, index in self.__indexes.items():
+                    value = self.__normalize(field, data.get(field))
+                    if value:
+                        index.setdefault(value, set()).add(key)
+
+    def lookup(self, field: str, value: str) -> set:
+        """Returns the `(ID, SECTION)` keys whose `field` contains `value`
+
+            - Exact values are found directly, otherwise every
+              distinct value of the field is checked, not every section
+            ~"""
+        index = self.__indexes[self.FIELDS[field]]
+        value = self.__normalize(self.FIELDS[field], value)
+        if not value:
+            return set()
+        if value in index:
+            return set(index[value])
+        found = set()
+        for indexed_value, keys in index.items():
+            if value in indexed_value:
+                found |= keys
+        return found
+
+    def query(self, terms: list) -> set:
+        """Returns the `(ID, SECTION)` keys matching all of the `(field, value)` terms"""
+        results = sorted((self.lookup(field, value) for field, value in terms), key=len)
+        if not results:
+            return set()
+        found = results[0]
+        for keys in results[1:]:
+            if not found:
+                break
+            found &= keys
+        return found
+
+    @classmethod
+    def parse_query(cls, text: str) -> Optional[list]:
+        """Parses `field:value field:value ...` into `(field, value)` terms
+
+            - A word without a field is added to the value of the field before it,
+              so `teacher:Ahmad Ali status:open` is two terms
+            - Returns `None` if a field is unknown or there are no terms
+            ~"""
+        terms = []
+        for word in text.split():
+            field, separator, value = word.partition(':')
+            if separator and field.lower() in cls.FIELDS:
+                terms.append([field.lower(), value])
+            elif separator or not terms:
+                return None
+            else:
+                terms[-1][1] = f'{terms[-1][1]} {word}'.strip()
+        if not terms or any(not value for _field, value in terms):
+            return None
+        return [tuple(term) for term in terms]
+
+    def memory_size(self) -> int:
+        """Returns a rough estimate in bytes of the memory held by the indexes"""
+        size = getsizeof(self.__indexes)
+        keys = set()
+        for index in self.__indexes.values():
+            size += getsizeof(index)
+            for value, found in index.items():
+                size += getsizeof(value) + getsizeof(found)
+                keys |= found
+        # the (ID, SECTION) keys are shared by the three indexes
+        return size + len(keys) * getsizeof(('', ''))
+
+    @staticmethod
+    def __normalize(field: str, value: Optional[str]) -> Optional[str]:
+        if not value:
+            return None
+        if field == 'status':
+            state = section_state(value)
+            return state.value if state else value.strip().lower()
+        return ' '.join(value.lower().split())
+
+    def __repr__(self):
+        return f"FieldIndex({', '.join(f'{field}={len(index)}' for field, index in self.__indexes.items())})"
+
+
+__all__ = ['FieldIndex']
@@ -0,0 +1,158 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from time import time
+import threading
+import ujson
+
+from .cache import SizedLRUCache
+from .data_handler import DataSession, Subjects
+from .history import SectionHistory
+from .logger import Logger
+from .profiler import Profiler
+from .stats import AvailabilityStats
+from . import paths
+
+
+class TimetableSource:
+    """A named timetable to scrape, like a term or a campus
+
+            :param name: the name users choose the source by
+            :param url: the timetable page of the source
+            :param refresh: minimum seconds between two refreshes of the source
+            :param history_path: file of the source's `SectionHistory`
+
+            ~"""
+    def __init__(self, name: str, url: str, refresh: float=20, history_path: Optional[str]=None):
+        self.name = name
+        self.url = url
+        self.refresh = refresh
+        self.session = DataSession(url, name)
+        self.run = self.session.run
+        """Scrapes a new snapshot, wrapped by the `Profiler` of the `SourceManager` if it has one"""
+        self.history = SectionHistory(history_path)
+        self.stats = None
+        """`AvailabilityStats` of the last recorded snapshot, `None` until the source loads"""
+        self.lock = threading.Lock()
+        """Held while the source is refreshing so it is only scraped once at a time"""
+        self.failed_at = 0
+        """`time()` of the last failed refresh, 0 after a successful one"""
+
+    def __repr__(self):
+        return f"TimetableSource(name={self.name}, refresh={self.refresh})"
+
+
+class SourceManager:
+    """Manages several timetable sources and caches their snapshots
+
+            :param config: `{'NAME': {'url': URL, 'refresh': SECONDS}, ...}` the first one is the default
+            :param max_cache_size: bytes of snapshots kept in memory at most, see `Subjects.memory_size`
+            :param profiler: profiles the refreshes when its `refresh` target is armed
+
+        A source is refreshed when it is requested and its snapshot is older than its own
+        `refresh`, different sources refresh at the same time without waiting for each other.
+        The least recently requested snapshots are evicted when the cache is full and are
+        scraped again the next time they are requested.
+        A failed refresh keeps serving the last snapshot of the source and the source
+        is not refreshed again before its `refresh` seconds passed since the failure.
+
+            ~"""
+    def __init__(self, config: dict, max_cache_size: int, profiler: Optional[Profiler]=None):
+        if not config:
+            raise ValueError('At least one timetable source is required, please fix data/sources.json')
+        self.__logger = Logger(self.__class__.__name__, logs_folder=paths.infologs_folder)
+        self.__sources = {}
+        for number, (name, source) in enumerate(config.items()):
+            # the default source keeps the history file it had before sources existed
+            history_path = paths.history if number == 0 else paths.history.replace('.jsonl', f'_{name}.jsonl')
+            self.__sources[name] = TimetableSource(name, source.get('url', DataSession.URL), source.get('refresh', 20), history_path)
+            if profiler:
+                self.__sources[name].run = profiler.wrap('refresh', self.__sources[name].session.run, name)
+        self.default = next(iter(self.__sources))
+        self.__cache = SizedLRUCache(max_cache_size, Subjects.memory_size)
+
+    @classmethod
+    def from_file(cls, file_path: str, max_cache_size: int, profiler: Optional[Profiler]=None) -> 'SourceManager':
+        """Creates a SourceManager from a JSON config file"""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return cls(ujson.load(file), max_cache_size, profiler)
+
+    def names(self) -> list:
+        """Returns the names of the sources, the default first"""
+        return list(self.__sources)
+
+    def history(self, name: Optional[str]=None) -> SectionHistory:
+        """Returns the `SectionHistory` of a source, the default if `name` is `None`"""
+        return self.__sources[name or self.default].history
+
+    def stats(self, name: Optional[str]=None) -> Optional[AvailabilityStats]:
+        """Returns the `AvailabilityStats` of a source, the default if `name` is `None`"""
+        return self.__sources[name or self.default].stats
+
+    def get(self, name: Optional[str]=None, force_update: bool=False) -> Optional[Subjects]:
+        """Returns the snapshot of a source, the default if `name` is `None`
+
+            - refreshes it first if it is missing, older than its source's
+              refresh time or if `force_update` is True
+            - does not refresh it while its last refresh failed less than its refresh time ago,
+              unless `force_update` is True
+            - returns `None` only if the source never loaded
+            ~"""
+        source = self.__sources[name or self.default]
+        subjects = self.__cache.get(source.name)
+        if subjects and not force_update and subjects.time() <= source.refresh:
+            return subjects
+        if not force_update and self.__backing_off(source):
+            return subjects
+
+        with source.lock:
+            # another request may have refreshed it while this one waited
+            latest = self.__cache.get(source.name)
+            if latest is not subjects and latest is not None:
+                return latest
+            # or it failed while this one waited
+            if not force_update and self.__backing_off(source):
+                return subjects
+            try:
+                new_subjects = source.run()
+            except Exception as e:
+                self.__logger.exception(f'Func={self.get.__name__}, source={source.name}, Error: {e}')
+                new_subjects = None
+            if not new_subjects:
+                source.failed_at = time()
+                self.__logger.error(f'Refresh failed, source={source.name}, serving_last={subjects is not None}, '
+                                    f'retry_in={source.refresh}s')
+                return subjects
+            source.failed_at = 0
+            changes = source.history.record(new_subjects)
+            if source.stats is None:
+                source.stats = AvailabilityStats(new_subjects)
+            else:
+                source.stats.apply(changes)
+            evicted = self.__cache.set(source.name, new_subjects)
+            if evicted:
+                self.__logger.info(f'Evicted {evicted} for {source.name}, cache={self.__cache}')
+            return new_subjects
+
+    @staticmethod
+    def __backing_off(source: TimetableSource) -> bool:
+        """Returns True if the last refresh of `source` failed less than its refresh time ago"""
+        return time() - source.failed_at < source.refresh
+
+    def refresh_all(self) -> None:
+        """Refreshes every source at the same time"""
+        with ThreadPoolExecutor(max_workers=len(self.__sources)) as executor:
+            list(executor.map(lambda name: self.get(name, True), self.__sources))
+
+    def close(self) -> None:
+        """Closes the sessions of every source"""
+        for source in self.__sources.values():
+            source.session.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__sources
+
+    def __repr__(self):
+        return f"SourceManager(sources={self.names()}, cache={self.__cache})"
+
+
+__all__ = ['TimetableSource', 'SourceManager']
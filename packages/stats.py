@@ -0,0 +1,113 @@
+from typing import Optional
+
+from .data_handler import Subjects, section_state
+
+
+class AvailabilityStats:
+    """Counts of open, closed and full sections per subject and overall
+
+            :param subjects: the snapshot to count from
+
+        The counts are built once from a full snapshot, then kept up to date
+        with the `(ID, SECTION, field, old, new)` changes of `SectionHistory.record`,
+        so reading them never walks `Subjects.list`
+
+            ~"""
+    STATES = ('open', 'closed', 'full', 'other')
+
+    def __init__(self, subjects: Subjects):
+        self.totals = dict.fromkeys(self.STATES, 0)
+        self.subjects = {}
+        """{'ID': {'open': COUNT, 'closed': COUNT, 'full': COUNT, 'other': COUNT}}"""
+        self.teachers = {}
+        """{'TEACHER': SECTIONS_COUNT}"""
+        for ID, sections in subjects.list.items():
+            for data in sections.values():
+                if data.get('status') is not None:
+                    self.__count_state(ID, data['status'], 1)
+                self.__count_teacher(data.get('teacher'), 1)
+
+    def apply(self, changes: list) -> None:
+        """Updates the counts with the changes between two snapshots"""
+        for ID, _section, field, old, new in changes:
+            if field == 'status':
+                if old is not None:
+                    self.__count_state(ID, old, -1)
+                if new is not None:
+                    self.__count_state(ID, new, 1)
+            elif field == 'teacher':
+                if old is not None:
+                    self.__count_teacher(old, -1)
+                if new is not None:
+                    self.__count_teacher(new, 1)
+
+    def teacher_sections(self, teacher: str) -> int:
+        """Returns how many sections `teacher` has"""
+        return self.teachers.get(teacher, 0)
+
+    def get_teacher_info(self, name: str, limit: int=20) -> Optional[str]:
+        """Gets how many sections every teacher whose name contains `name` has
+
+            - limit: teachers listed at most, the rest are only counted
+
+            - Returns a `string` or `None` if no teacher matches
+            ### String example
+            >>> 'TEACHER: COUNT sections\\n'
+            ~"""
+        name = ' '.join(name.lower().split())
+        if not name:
+            return None
+        found = sorted(teacher for teacher in self.teachers if name in ' '.join(teacher.lower().split()))
+        if not found:
+            return None
+        info = ''.join(f"{teacher}: {self.teacher_sections(teacher)} sections\n" for teacher in found[:limit])
+        if len(found) > limit:
+            info += f"And {len(found) - limit} more teachers, please enter more of the name\n"
+        return info
+
+    def get_stats_info(self, ID: Optional[str]=None, name: Optional[str]=None) -> Optional[str]:
+        """Gets the section counts of a subject or of all subjects if ID is None
+
+            - name: the name of the subject to show above its counts
+
+            - Returns a `string` or `None` if ID is not found
+            ### String example
+            >>> 'NAME\\n'
+            >>> 'Sections: TOTAL\\n'
+            >>> 'Open: COUNT, Closed: COUNT, Full: COUNT\\n'
+            ~"""
+        if ID is None:
+            counts = self.totals
+            info = f"All subjects: {len(self.subjects)}, Teachers: {len(self.teachers)}\n"
+        elif str(ID) in self.subjects:
+            counts = self.subjects[str(ID)]
+            info = f"{name or ID}\n"
+        else:
+            return None
+        info += (f"Sections: {sum(counts.values())}\n"
+                 f"Open: {counts['open']}, Closed: {counts['closed']}, Full: {counts['full']}\n")
+        if counts['other']:
+            info += f"Unknown status: {counts['other']}\n"
+        return info
+
+    def __count_state(self, ID: str, status: str, step: int) -> None:
+        state = section_state(status)
+        state = state.value if state else 'other'
+        counts = self.subjects.setdefault(ID, dict.fromkeys(self.STATES, 0))
+        counts[state] += step
+        self.totals[state] += step
+        if not any(counts.values()):
+            del self.subjects[ID]
+
+    def __count_teacher(self, teacher: str, step: int) -> None:
+        if not teacher:
+            return
+        self.teachers[teacher] = self.teachers.get(teacher, 0) + step
+        if self.teachers[teacher] <= 0:
+            del self.teachers[teacher]
+
+    def __repr__(self):
+        return f"AvailabilityStats(subjects={len(self.subjects)}, totals={self.totals})"
+
+
+__all__ = ['AvailabilityStats']
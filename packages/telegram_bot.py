@@ -1,10 +1,20 @@
 import telebot
 from os.path import exists
 import ujson
-from time import sleep
+from time import sleep, time, localtime, strftime
 import threading
-
-from .data_handler import DataSession
+import secrets
+import signal
+
+from typing import Optional
+
+from .data_handler import Subjects
+from .sources import SourceManager
+from .planner import Planner
+from .query import FieldIndex
+from .cache import TTLCache
+from .profiler import Profiler
+from .timeslots import DAYS, parse_day, parse_range, format_minutes
 from .logger import Logger
 from . import paths
 from . import MESSAGES
@@ -32,6 +42,20 @@ class TeleSession(telebot.TeleBot):
                 A thread for polling the bot.
             __favorites : dict
                 A dictionary to store user favorites.
+            __sources : SourceManager
+                The timetable sources, their snapshots and change histories.
+            __user_sources : dict
+                The timetable source each user chose.
+            __admin_ids : set
+                The user ids allowed to use the admin commands.
+            __profiler : Profiler
+                Profiles the next handler calls or refreshes when armed by an admin.
+            __search_cursors : TTLCache
+                The result lines of recent searches by their cursor id.
+            __reply_tags : TTLCache
+                The snapshot tag, message id and time of the last reply to a chat's request.
+            suppressed_calls : int
+                Telegram API calls saved by answering repeated requests with a short note.
 
         Methods:
         --------
@@ -45,18 +69,42 @@ class TeleSession(telebot.TeleBot):
                 Handles the /help command.
             __SEARCH(message: telebot.types.Message) -> bool:
                 Handles the /search command.
+            __SEARCH_PAGE(call: telebot.types.CallbackQuery) -> bool:
+                Handles the next and previous buttons of /search results.
             __GET(message: telebot.types.Message) -> int:
                 Handles the /get command.
             __FAV(message: telebot.types.Message) -> bool:
                 Handles the /fav command.
+            __FIND(message: telebot.types.Message) -> bool:
+                Handles the /find command.
+            __FREE(message: telebot.types.Message) -> bool:
+                Handles the /free command.
+            __STATS(message: telebot.types.Message) -> bool:
+                Handles the /stats command.
+            __PLAN(message: telebot.types.Message) -> bool:
+                Handles the /plan command.
+            __HISTORY(message: telebot.types.Message) -> bool:
+                Handles the /history command.
+            __TERM(message: telebot.types.Message) -> bool:
+                Handles the /term command.
+            __PROFILE(message: telebot.types.Message) -> bool:
+                Handles the admin /profile command.
             __SUGGEST(message: telebot.types.Message):
                 Handles the /suggest command.
-            __FavoriteHandler(user_id: str, handleType: str, subject_id: str, section_number: str):
+            __FavoriteHandler(user_id: str, handleType: str, subject_id: str, section_number: str, subjects: Subjects=None):
                 Manages favorite commands.
+            __SearchPage(cursor: str, result_lines: list, page: int) -> tuple:
+                Builds a page of cached search results.
+            __ReplyUnchanged(message: telebot.types.Message, key: str, tag: tuple) -> bool:
+                Answers a repeated request whose reply did not change.
+            __TagReply(message: telebot.types.Message, key: str, tag: tuple, message_id: int):
+                Remembers the tag of a reply.
             __isUserActive(message: telebot.types.Message) -> bool:
                 Checks if a user is active.
-            __Update(force_update: bool=False):
-                Updates the subjects data.
+            __UserSource(message: telebot.types.Message) -> str:
+                Gets the timetable source of a user.
+            __Update(message: telebot.types.Message, force_update: bool=False) -> Optional[Subjects]:
+                Updates and returns the subjects data of the user's source.
             __runPolling():
                 Runs the polling thread.
             __LogUser(message: telebot.types.Message, log_message: str=None) -> None:
@@ -64,7 +112,18 @@ class TeleSession(telebot.TeleBot):
             __Exit(message: telebot.types.Message, log_user: bool=False, log_message: str=None):
                 Removes user from active list and logs if needed."""
     
-    def __init__(self, token: str, *args, **kwargs):
+    SEARCH_PAGE_SIZE = 30
+    """ Result lines shown in one page of /search """
+    SEARCH_CURSOR_TTL = 600
+    """ Seconds the results of a /search can still be paged """
+    SNAPSHOT_CACHE_SIZE = 256 * 1024 * 1024
+    """ Bytes of timetable snapshots kept in memory at most """
+    PROFILE_SIGNAL_CALLS = 20
+    """ Handler calls profiled when the process receives SIGUSR1 """
+    REPLY_TAG_TTL = 3600
+    """ Seconds a reply can be pointed to instead of sending it again """
+
+    def __init__(self, token: str, *args, admin_ids: Optional[list]=None, **kwargs):
         if token == None or len(token) < 40:
             raise ValueError('Token is empty, please set TELE_TOKEN correctly, '
                              'please go to /data/telegram_bot.env and fix it.')
@@ -85,20 +144,43 @@ class TeleSession(telebot.TeleBot):
         with open(paths.fav, 'r', encoding='utf-8') as file:
             self.__favorites: dict = ujson.load(file)
         
-        self.__session = DataSession()
-        self.__subjects = self.__session.run()
+        with open(paths.user_sources, 'r', encoding='utf-8') as file:
+            self.__user_sources: dict = ujson.load(file)
+
+        self.__admin_ids = set(admin_ids or [])
+        self.__profiler = Profiler(paths.profiles_folder, paths.infologs_folder)
+        self.__search_cursors = TTLCache(self.SEARCH_CURSOR_TTL)
+        self.__reply_tags = TTLCache(self.REPLY_TAG_TTL, max_size=10000)
+        self.suppressed_calls = 0
+        self.__suppressed_lock = threading.Lock()
+        self.__sources = SourceManager.from_file(paths.sources, self.SNAPSHOT_CACHE_SIZE, self.__profiler)
+        self.__sources.refresh_all()
         
   
     def start(self):
         """Starts the telegram session and starts listening for messages"""
         self.is_polling = True
         
-        self.message_handler(commands=['start'])(self.__START)
-        self.message_handler(commands=['help'])(self.__HELP)
-        self.message_handler(commands=['search'])(self.__SEARCH)
-        self.message_handler(commands=['get'])(self.__GET)
-        self.message_handler(commands=['fav'])(self.__FAV) # TODO
-        self.message_handler(commands=['suggest'])(self.__SUGGEST)
+        # handlers are wrapped once so the profiler can time them when an admin arms it
+        profiled = lambda handler: self.__profiler.wrap('handlers', handler)
+        self.message_handler(commands=['start'])(profiled(self.__START))
+        self.message_handler(commands=['help'])(profiled(self.__HELP))
+        self.message_handler(commands=['search'])(profiled(self.__SEARCH))
+        self.callback_query_handler(func=lambda call: call.data.startswith('search:'))(profiled(self.__SEARCH_PAGE))
+        self.message_handler(commands=['get'])(profiled(self.__GET))
+        self.message_handler(commands=['fav'])(profiled(self.__FAV)) # TODO
+        self.message_handler(commands=['find'])(profiled(self.__FIND))
+        self.message_handler(commands=['free'])(profiled(self.__FREE))
+        self.message_handler(commands=['stats'])(profiled(self.__STATS))
+        self.message_handler(commands=['plan'])(profiled(self.__PLAN))
+        self.message_handler(commands=['history'])(profiled(self.__HISTORY))
+        self.message_handler(commands=['term'])(profiled(self.__TERM))
+        self.message_handler(commands=['profile'])(self.__PROFILE)
+        self.message_handler(commands=['suggest'])(profiled(self.__SUGGEST))
+
+        # `kill -USR1 PID` profiles the next handler calls without going through telegram
+        if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, lambda _signum, _frame: self.__profiler.arm(self.PROFILE_SIGNAL_CALLS))
 
         # TODO Threading issue exists, cant ctrl+c the program
         if self.polling_thread is None or not self.polling_thread.is_alive():
@@ -110,7 +192,7 @@ class TeleSession(telebot.TeleBot):
         self.is_polling = False
         self.stop_polling()
         self.__active_users.clear()
-        self.__session.close()
+        self.__sources.close()
         
         if self.polling_thread:
             self.polling_thread.join()
@@ -152,25 +234,61 @@ class TeleSession(telebot.TeleBot):
             )
             self.__Exit(message)
             return False
+        if (subjects := self.__Update(message)) is None:
+            return False
         searching_message = self.send_message(message.chat.id, 'Searching...')
-        results = self.__subjects.search_by_name(subject_name)
-        result_text = "ID: Name\n"
-        for Id, Name in results.items():
-            result_text += f"`{Id}`: {Name}\n"
+        results = subjects.search_by_name(subject_name)
+        result_lines = [f"`{Id}`: {Name}\n" for Id, Name in results.items()]
 
-
-        if len(result_text) > 4000:
-            self.send_message(message.chat.id, MESSAGES.SEARCH_ERROR_3)
-            self.__Exit(message)
-            return False
-        
         if not results:
             self.edit_message_text(f'No match found for `{subject_name}`! 💀', message.chat.id, searching_message.id, parse_mode="Markdown")
         else:
-            self.edit_message_text(result_text, message.chat.id, searching_message.id, parse_mode="Markdown")
+            # results are kept under a cursor so the page buttons never search again
+            cursor = secrets.token_hex(4)
+            self.__search_cursors.set(cursor, result_lines)
+            result_text, keyboard = self.__SearchPage(cursor, result_lines, 0)
+            self.edit_message_text(result_text, message.chat.id, searching_message.id, parse_mode="Markdown", reply_markup=keyboard)
         self.__Exit(message, True, MESSAGES.SEARCH_LOG_1F.format(self.__SEARCH.__name__, '-'.join(text_list[1:])))
         return True
     
+    def __SEARCH_PAGE(self, call: telebot.types.CallbackQuery) -> bool:
+        _prefix, cursor, page = call.data.split(':')
+        result_lines = self.__search_cursors.get(cursor)
+        if result_lines is None:
+            self.answer_callback_query(call.id, MESSAGES.SEARCH_ERROR_3)
+            self.edit_message_reply_markup(call.message.chat.id, call.message.id)
+            return False
+
+        result_text, keyboard = self.__SearchPage(cursor, result_lines, int(page))
+        self.edit_message_text(result_text, call.message.chat.id, call.message.id, parse_mode="Markdown", reply_markup=keyboard)
+        self.answer_callback_query(call.id)
+        return True
+
+    def __SearchPage(self, cursor: str, result_lines: list, page: int) -> tuple:
+        """Builds a page of cached search results
+            :param cursor: The cursor id the results are cached under
+            :param result_lines: All of the result lines of the search
+            :param page: The page number starting from 0
+
+            - Returns `(text, keyboard)`, keyboard is `None` if there is only one page
+            ~"""
+        page_count = -(-len(result_lines) // self.SEARCH_PAGE_SIZE)
+        page = min(max(page, 0), page_count - 1)
+        first = page * self.SEARCH_PAGE_SIZE
+        result_text = "ID: Name\n" + ''.join(result_lines[first:first + self.SEARCH_PAGE_SIZE])
+        if page_count == 1:
+            return result_text, None
+
+        result_text += MESSAGES.SEARCH_PAGE_1F.format(page + 1, page_count)
+        buttons = []
+        if page > 0:
+            buttons.append(telebot.types.InlineKeyboardButton(MESSAGES.SEARCH_BUTTON_PREV, callback_data=f'search:{cursor}:{page - 1}'))
+        if page < page_count - 1:
+            buttons.append(telebot.types.InlineKeyboardButton(MESSAGES.SEARCH_BUTTON_NEXT, callback_data=f'search:{cursor}:{page + 1}'))
+        keyboard = telebot.types.InlineKeyboardMarkup()
+        keyboard.row(*buttons)
+        return result_text, keyboard
+
     def __GET(self, message: telebot.types.Message) -> int:
         if self.__isUserActive(message):
             return False
@@ -190,20 +308,28 @@ class TeleSession(telebot.TeleBot):
             self.__Exit(message)
             return False
 
+        # updates first so a failed update leaves no wait message behind
+        source = self.__UserSource(message)
+        if (subjects := self.__Update(message)) is None:
+            return False
+        # a repeat of the last request on the same snapshot version points to the last reply
+        reply_key = f'get {subject_id} {subject_section}'
+        if self.__ReplyUnchanged(message, reply_key, (source, subjects.version)):
+            self.__Exit(message, True, MESSAGES.GET_LOG_1F.format(self.__GET.__name__, subject_id, subject_section or 'None'))
+            return True
         result_text = ''
         getting_message = None
         if subject_section is None:
             ## ony ID
             getting_message = self.send_message(message.chat.id, MESSAGES.GET_WAIT_1F.format(subject_id))
-            self.__Update()
-            result_text = self.__subjects.get_all_sections_info(subject_id) or MESSAGES.GET_RESULT_1FM.format(subject_id)
+            result_text = subjects.get_all_sections_info(subject_id) or MESSAGES.GET_RESULT_1FM.format(subject_id)
         else:
             ## ID and SECTION
             getting_message = self.send_message(message.chat.id, MESSAGES.GET_WAIT_2F.format(subject_id, subject_section))
-            self.__Update()
-            result_text = self.__subjects.get_section_info(subject_id, subject_section) or MESSAGES.GET_RESULT_2FM.format(subject_id, subject_section)
+            result_text = subjects.get_section_info(subject_id, subject_section) or MESSAGES.GET_RESULT_2FM.format(subject_id, subject_section)
         
         self.edit_message_text(result_text, message.chat.id, getting_message.id, parse_mode='Markdown')
+        self.__TagReply(message, reply_key, (source, subjects.version), getting_message.id)
         self.__Exit(message, True, MESSAGES.GET_LOG_1F.format(self.__GET.__name__, subject_id, subject_section or 'None'))
         return True
         
@@ -236,32 +362,251 @@ class TeleSession(telebot.TeleBot):
             self.__Exit(message)
             return False
 
-        wait_message = self.send_message(message.chat.id, MESSAGES.FAV_WAIT_1)
         handleType = text[1]
         subject_id = None
         section_number = None
         if handleType not in noArgCommands:
             subject_id = text[2]
             section_number = text[3]
-        
-        
-        result = self.__FavoriteHandler(message.from_user.id, handleType, subject_id, section_number)
+
+        source = self.__UserSource(message)
+        user_favorites = tuple((ID, tuple(SECTIONS)) for ID, SECTIONS in self.__favorites.get(str(message.from_user.id), {}).items())
+        subjects = None
+        if handleType == 'show' and (subjects := self.__Update(message)) is None:
+            return False
+        # show depends on the snapshot and on the favorites, both are in its tag
+        if handleType == 'show' and self.__ReplyUnchanged(message, 'fav show', (source, subjects.version, user_favorites)):
+            self.__Exit(message, True, MESSAGES.FAV_LOG_1F.format(self.__FAV.__name__, handleType, subject_id, section_number))
+            return True
+        wait_message = self.send_message(message.chat.id, MESSAGES.FAV_WAIT_1)
+        result = self.__FavoriteHandler(str(message.from_user.id), handleType, subject_id, section_number, subjects)
         
         self.edit_message_text(result, message.chat.id, wait_message.id)
+        if handleType == 'show':
+            self.__TagReply(message, 'fav show', (source, subjects.version, user_favorites), wait_message.id)
         self.__Exit(message, True, MESSAGES.FAV_LOG_1F.format(self.__FAV.__name__, handleType, subject_id, section_number))
         return True
 
-    
+
+    def __FIND(self, message: telebot.types.Message) -> bool:
+        if self.__isUserActive(message):
+            return False
+        query = message.text.partition(' ')[2].strip()
+        if FieldIndex.parse_query(query) is None:
+            self.send_message(message.chat.id, MESSAGES.FIND_ERROR_1M, parse_mode='Markdown')
+            self.__Exit(message)
+            return False
+
+        if (subjects := self.__Update(message)) is None:
+            return False
+        results = subjects.search_by_fields(query)
+
+        result_text = ''
+        for ID, sections in results.items():
+            name = subjects.list[ID][sections[0]]['name']
+            line = f"`{ID}` {name}: {', '.join(sections)}\n"
+            if len(result_text) + len(line) > 4000 - len(MESSAGES.FIND_RESULT_2):
+                result_text += MESSAGES.FIND_RESULT_2
+                break
+            result_text += line
+
+        if results:
+            self.send_message(message.chat.id, result_text, parse_mode='Markdown')
+        else:
+            # the query is the user's text, as Markdown a stray ` or * makes Telegram refuse the message
+            self.send_message(message.chat.id, MESSAGES.FIND_RESULT_1F.format(query))
+        self.__Exit(message, True, MESSAGES.FIND_LOG_1F.format(self.__FIND.__name__, query))
+        return True
+
+    def __FREE(self, message: telebot.types.Message) -> bool:
+        if self.__isUserActive(message):
+            return False
+        text = message.text.split()
+
+        error_message = None
+        day = window = None
+        if len(text) < 3:
+            error_message = MESSAGES.FREE_ERROR_1M
+        elif (day := parse_day(text[1])) is None:
+            error_message = MESSAGES.FREE_ERROR_2FM.format(text[1])
+        elif (window := parse_range(''.join(text[2:]))) is None:
+            error_message = MESSAGES.FREE_ERROR_3FM.format(' '.join(text[2:]))
+
+        if error_message:
+            self.send_message(message.chat.id, error_message, parse_mode='Markdown')
+            self.__Exit(message)
+            return False
+
+        if (subjects := self.__Update(message)) is None:
+            return False
+        start, end = window
+        results = subjects.search_by_time(day, start, end)
+        result_text = ''
+        for ID, section, slot_start, slot_end in results:
+            line = (f"{format_minutes(slot_start)}-{format_minutes(slot_end)} "
+                    f"{ID} {section:>2}, {subjects.list[ID][section]['name']}\n")
+            if len(result_text) + len(line) > 4000 - len(MESSAGES.FREE_RESULT_2):
+                result_text += MESSAGES.FREE_RESULT_2
+                break
+            result_text += line
+        if not results:
+            result_text = MESSAGES.FREE_RESULT_1F.format(DAYS[day].capitalize(), format_minutes(start), format_minutes(end))
+
+        self.send_message(message.chat.id, result_text)
+        self.__Exit(message, True, MESSAGES.FREE_LOG_1F.format(self.__FREE.__name__, DAYS[day], '-'.join(text[2:])))
+        return True
+
+    def __STATS(self, message: telebot.types.Message) -> bool:
+        if self.__isUserActive(message):
+            return False
+        text = message.text.split()
+        subject_id = text[1] if len(text) > 1 else None
+        teacher = None
+        if subject_id is not None and subject_id.lower().startswith('teacher:'):
+            teacher = message.text.partition(':')[2].strip()
+            subject_id = None
+            if not teacher:
+                self.send_message(message.chat.id, MESSAGES.STATS_ERROR_2M, parse_mode='Markdown')
+                self.__Exit(message)
+                return False
+        if subject_id is not None and (len(subject_id) != 6 or not subject_id.isnumeric()):
+            self.send_message(message.chat.id, MESSAGES.STATS_ERROR_1FM.format(subject_id), parse_mode='Markdown')
+            self.__Exit(message)
+            return False
+
+        if (subjects := self.__Update(message)) is None:
+            return False
+        stats = self.__sources.stats(self.__UserSource(message))
+        if teacher is not None:
+            # the teacher is the user's text, it is not sent as Markdown
+            self.send_message(message.chat.id, stats.get_teacher_info(teacher) or MESSAGES.STATS_RESULT_2F.format(teacher))
+            self.__Exit(message, True, MESSAGES.STATS_LOG_2F.format(self.__STATS.__name__, teacher))
+            return True
+        name = None
+        if subject_id in subjects.list:
+            name = next(iter(subjects.list[subject_id].values()), {}).get('name')
+        result_text = stats.get_stats_info(subject_id, name) or MESSAGES.STATS_RESULT_1FM.format(subject_id)
+
+        self.send_message(message.chat.id, result_text)
+        self.__Exit(message, True, MESSAGES.STATS_LOG_1F.format(self.__STATS.__name__, subject_id or 'None'))
+        return True
+
+    def __PLAN(self, message: telebot.types.Message) -> bool:
+        if self.__isUserActive(message):
+            return False
+        # favorites.json stores the user ids as strings
+        favorites = self.__favorites.get(str(message.from_user.id), {})
+        if not favorites:
+            self.send_message(message.chat.id, MESSAGES.PLAN_ERROR_1)
+            self.__Exit(message)
+            return False
+
+        if (subjects := self.__Update(message)) is None:
+            return False
+        planning_message = self.send_message(message.chat.id, MESSAGES.PLAN_WAIT_1)
+        timetables, missing, complete = Planner(subjects).plan(list(favorites))
+
+        result_text = ''
+        for number, timetable in enumerate(timetables, 1):
+            result_text += MESSAGES.PLAN_RESULT_1F.format(number, timetable.days, timetable.idle, timetable.closed)
+            for ID, sections in sorted(timetable.choices):
+                result_text += f"{ID}: {'/'.join(sections)}, {subjects.list[ID][sections[0]]['time']}\n"
+            result_text += '\n'
+        if not timetables:
+            result_text = MESSAGES.PLAN_RESULT_2
+        if missing:
+            result_text += MESSAGES.PLAN_RESULT_3F.format(', '.join(missing))
+        if not complete:
+            result_text += MESSAGES.PLAN_RESULT_4
+
+        self.edit_message_text(result_text, message.chat.id, planning_message.id)
+        self.__Exit(message, True, MESSAGES.PLAN_LOG_1F.format(self.__PLAN.__name__, '-'.join(favorites)))
+        return True
+
+    def __HISTORY(self, message: telebot.types.Message) -> bool:
+        if self.__isUserActive(message):
+            return False
+        text = message.text.split()
+
+        error_message = None
+        if len(text) < 3:
+            error_message = MESSAGES.HISTORY_ERROR_1M
+        elif len(text[1]) != 6 or not text[1].isnumeric():
+            error_message = MESSAGES.HISTORY_ERROR_2FM.format(text[1])
+        elif len(text[2]) > 2 or not text[2].isnumeric():
+            error_message = MESSAGES.HISTORY_ERROR_3FM.format(text[2])
+
+        if error_message:
+            self.send_message(message.chat.id, error_message, parse_mode='Markdown')
+            self.__Exit(message)
+            return False
+
+        subject_id, subject_section = text[1], text[2]
+        if self.__Update(message) is None:
+            return False
+        history = self.__sources.history(self.__UserSource(message))
+        result_text = (history.get_history_info(subject_id, subject_section)
+                       or MESSAGES.HISTORY_RESULT_1F.format(subject_id, subject_section))
+
+        self.send_message(message.chat.id, result_text)
+        self.__Exit(message, True, MESSAGES.HISTORY_LOG_1F.format(self.__HISTORY.__name__, subject_id, subject_section))
+        return True
+
+    def __TERM(self, message: telebot.types.Message) -> bool:
+        if self.__isUserActive(message):
+            return False
+        text = message.text.split()
+        current = self.__UserSource(message)
+
+        if len(text) == 1:
+            sources = ''.join(f"{'➤' if name == current else '•'} `{name}`\n" for name in self.__sources.names())
+            self.send_message(message.chat.id, MESSAGES.TERM_LIST_1FM.format(sources), parse_mode='Markdown')
+            self.__Exit(message)
+            return True
+        if text[1] not in self.__sources:
+            self.send_message(message.chat.id, MESSAGES.TERM_ERROR_1FM.format(text[1]), parse_mode='Markdown')
+            self.__Exit(message)
+            return False
+
+        self.__user_sources[str(message.from_user.id)] = text[1]
+        with open(paths.user_sources, 'w', encoding='utf-8') as file:
+            ujson.dump(self.__user_sources, file, indent=4)
+        self.send_message(message.chat.id, MESSAGES.TERM_RESULT_1FM.format(text[1]), parse_mode='Markdown')
+        self.__Exit(message, True, MESSAGES.TERM_LOG_1F.format(self.__TERM.__name__, current, text[1]))
+        return True
+
+    def __PROFILE(self, message: telebot.types.Message) -> bool:
+        if message.from_user.id not in self.__admin_ids:
+            self.send_message(message.chat.id, MESSAGES.PROFILE_ERROR_1)
+            return False
+        text = message.text.split()
+
+        if len(text) == 1:
+            self.send_message(message.chat.id, MESSAGES.PROFILE_STATUS_1F.format(self.__profiler.remaining()))
+            return True
+        calls = text[1]
+        target = text[2] if len(text) > 2 else 'handlers'
+        memory = len(text) > 3 and text[3] == 'memory'
+        if not calls.isdecimal() or target not in Profiler.TARGETS:
+            self.send_message(message.chat.id, MESSAGES.PROFILE_ERROR_2M, parse_mode='Markdown')
+            return False
+
+        self.__profiler.arm(int(calls), target, memory)
+        self.send_message(message.chat.id, MESSAGES.PROFILE_RESULT_1F.format(calls, target, paths.profiles_folder))
+        self.__LogUser(message, MESSAGES.PROFILE_LOG_1F.format(self.__PROFILE.__name__, calls, target, memory))
+        return True
+
     def __SUGGEST(self, message: telebot.types.Message):
         # TODO
         pass
 
-    def __FavoriteHandler(self, user_id: str, handleType: str, subject_id: str, section_number: str):
+    def __FavoriteHandler(self, user_id: str, handleType: str, subject_id: str, section_number: str, subjects: Subjects=None):
         """Handles the three cases of the favorite commands
             :param user_id: The id of the user to handle
             :param handleType: The type of the favorite command [`show`, `add`, `delete`, `clear`]
             :param subject_id: The id of the subject
             :param section_number: The number of the section
+            :param subjects: The subjects to show the favorites from, needed by `show`
             
             ~"""
         # 0 -> a response text is not ready
@@ -281,10 +626,9 @@ class TeleSession(telebot.TeleBot):
                 ujson.dump(self.__favorites, file, indent=4)
                 
         elif handleType == 'show':
-            self.__Update()
             for ID, SECTIONS in self.__favorites.get(user_id, {}).items():
                 for section in SECTIONS:
-                    response_text += f'{section} | {ID} | {self.__subjects.get_section_info(ID, section)}'
+                    response_text += f'{section} | {ID} | {subjects.get_section_info(ID, section)}'
             if response_text == '':
                 response_text = 'No favorites to show 🤡!'
             status = 1
@@ -319,6 +663,33 @@ class TeleSession(telebot.TeleBot):
             status = 2
         return response_text if status == 1 else 'ERROR'
 
+    def __ReplyUnchanged(self, message: telebot.types.Message, key: str, tag: tuple) -> bool:
+        """Answers a repeated request with a short note pointing to its last reply
+            :param message: The message of the user
+            :param key: The request, like `get ID SECTION`
+            :param tag: What the reply depends on, starting with the source and snapshot version
+
+            - Returns True if the last reply to `key` in this chat had the same tag and was pointed to
+            ~"""
+        last_reply = self.__reply_tags.get((message.chat.id, key))
+        if last_reply is None or last_reply[0] != tag:
+            return False
+        _tag, message_id, replied_at = last_reply
+        self.send_message(
+            message.chat.id,
+            MESSAGES.REPLY_UNCHANGED_1F.format(strftime('%H:%M', localtime(replied_at))),
+            reply_parameters=telebot.types.ReplyParameters(message_id, allow_sending_without_reply=True))
+        # a full reply is a wait message and its edit, the note is only one call
+        with self.__suppressed_lock:
+            self.suppressed_calls += 1
+            suppressed_calls = self.suppressed_calls
+        self.__infoLogger.info(f'Func={self.__ReplyUnchanged.__name__}, key={key}, suppressed_calls={suppressed_calls}')
+        return True
+
+    def __TagReply(self, message: telebot.types.Message, key: str, tag: tuple, message_id: int) -> None:
+        """Remembers the tag of the reply to `key` in this chat, see `__ReplyUnchanged`"""
+        self.__reply_tags.set((message.chat.id, key), (tag, message_id, time()))
+
     def __isUserActive(self, message: telebot.types.Message) -> bool:
         """
             Checks if user is active
@@ -333,16 +704,27 @@ class TeleSession(telebot.TeleBot):
             self.__active_users[chat_id] = None
             return False
 
-    def __Update(self, force_update: bool=False):
+    def __UserSource(self, message: telebot.types.Message) -> str:
+        """Returns the timetable source the user chose with /term or the default one"""
+        source = self.__user_sources.get(str(message.from_user.id))
+        return source if source in self.__sources else self.__sources.default
+
+    def __Update(self, message: telebot.types.Message, force_update: bool=False) -> Optional[Subjects]:
         """An updater for the status of subjects updater 
             only runs when called and minimum time between
-            updates is 20 seconds
+            updates is the `refresh` of the user's source
             
-            - updates self.__subjects
+            - returns the subjects of the user's source
+            - if the source never loaded sends an error,
+              removes the user from active list and returns None
             - you can force update it by setting the 
               parameter force_update to True"""
-        if force_update or self.__subjects.time() > 20:
-            self.__subjects = self.__session.run()
+        source = self.__UserSource(message)
+        subjects = self.__sources.get(source, force_update)
+        if subjects is None:
+            self.send_message(message.chat.id, MESSAGES.TERM_ERROR_2F.format(source))
+            self.__Exit(message)
+        return subjects
             
     def __runPolling(self):
         """
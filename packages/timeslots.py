@@ -0,0 +1,170 @@
+import re
+from bisect import bisect_left
+from typing import Optional
+from sys import getsizeof
+
+
+DAYS = ('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat')
+""" Index of a day in this tuple is the day number used in the slots """
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+_DAY_NAMES = {
+    0: ('sun', 'sunday', 'su', 'أحد', 'احد', 'الأحد', 'الاحد', 'ح'),
+    1: ('mon', 'monday', 'mo', 'اثنين', 'إثنين', 'الاثنين', 'الإثنين', 'ن'),
+    2: ('tue', 'tuesday', 'tu', 'ثلاثاء', 'الثلاثاء', 'ث'),
+    3: ('wed', 'wednesday', 'we', 'أربعاء', 'اربعاء', 'الأربعاء', 'الاربعاء', 'ر'),
+    4: ('thu', 'thursday', 'th', 'خميس', 'الخميس', 'خ'),
+    5: ('fri', 'friday', 'fr', 'جمعة', 'الجمعة', 'ج'),
+    6: ('sat', 'saturday', 'sa', 'سبت', 'السبت', 'س'),
+}
+DAY_NUMBERS = {name: day for day, names in _DAY_NAMES.items() for name in names}
+""" {'DAY_NAME': DAY_NUMBER} every accepted spelling of a day """
+
+_TOKENS = re.compile(
+    r'(?P<range>(?<!\d)(\d{1,2})(?:[:.](\d{2}))?\s*[-–]\s*(\d{1,2})(?:[:.](\d{2}))?(?!\d))'
+    r'|(?P<word>[^\W\d_]+)')
+
+
+def parse_day(text: str) -> Optional[int]:
+    """Returns the day number of a day name or `None` if it is not a day"""
+    text = text.strip().lower()
+    if text.endswith('ه'):
+        text = text[:-1] + 'ة'
+    return DAY_NUMBERS.get(text)
+
+
+def parse_slots(text: str) -> list:
+    """Parses a scraped `time` string into `(DAY, START, END)` slots
+
+        - DAY is an index in `DAYS`, START and END are minutes since midnight
+        - Days are applied to the time ranges next to them, in both
+          `DAYS TIME` and `TIME DAYS` orders, 12-hour times are moved
+          to the afternoon when they can not be morning lectures
+
+        - Returns an empty list if nothing could be parsed
+        ### Example
+        >>> parse_slots('Sun Tue 08:00-09:30')
+        >>> [(0, 480, 570), (2, 480, 570)]
+        ~"""
+    slots = []
+    days, ranges = [], []
+    last_kind = None
+    for token in _TOKENS.finditer(text or ''):
+        if token.group('range'):
+            kind = 'range'
+            value = _parse_range(*token.group(2, 3, 4, 5))
+        else:
+            kind = 'day'
+            value = parse_day(token.group('word'))
+        if value is None:
+            continue
+        # a new group starts when a kind appears again after both were seen
+        if kind != last_kind and days and ranges:
+            slots.extend((day, start, end) for day in days for start, end in ranges)
+            days, ranges = [], []
+        (ranges if kind == 'range' else days).append(value)
+        last_kind = kind
+    slots.extend((day, start, end) for day in days for start, end in ranges)
+    return sorted(set(slots))
+
+
+def parse_range(text: str) -> Optional[tuple]:
+    """Parses a single time range like `8-12` or `08:00-12:30`
+
+        - Returns `(START, END)` minutes since midnight or `None` if it is invalid
+        ~"""
+    token = _TOKENS.fullmatch(text.strip())
+    if not token or not token.group('range'):
+        return None
+    return _parse_range(*token.group(2, 3, 4, 5))
+
+
+def _parse_range(start_h: str, start_m: Optional[str], end_h: str, end_m: Optional[str]) -> Optional[tuple]:
+    """Returns `(START, END)` minutes of a time range or `None` if it is invalid"""
+    start_h, end_h = int(start_h), int(end_h)
+    if start_h < 7:
+        start_h += 12
+    if end_h < 7 or end_h < start_h:
+        end_h += 12
+    start = start_h * 60 + int(start_m or 0)
+    end = end_h * 60 + int(end_m or 0)
+    if not 0 <= start < end <= 24 * 60:
+        return None
+    return start, end
+
+
+def slots_to_mask(slots: list) -> int:
+    """Converts `(DAY, START, END)` slots into a weekly bitmask
+
+        - Every bit is a `SLOT_MINUTES` slot of the week, two masks
+          overlap in time only if `mask1 & mask2` is not 0
+        ~"""
+    mask = 0
+    for day, start, end in slots:
+        first = day * SLOTS_PER_DAY + start // SLOT_MINUTES
+        last = day * SLOTS_PER_DAY + -(-end // SLOT_MINUTES)
+        mask |= ((1 << (last - first)) - 1) << first
+    return mask
+
+
+def day_mask(day: int) -> int:
+    """Returns the bitmask that covers the whole `day`"""
+    return ((1 << SLOTS_PER_DAY) - 1) << (day * SLOTS_PER_DAY)
+
+
+def format_minutes(minutes: int) -> str:
+    """Formats minutes since midnight as `HH:MM`"""
+    return f'{minutes // 60:02}:{minutes % 60:02}'
+
+
+class IntervalIndex:
+    """Indexes the slots of a snapshot by day and start time
+
+            :param time_slots: `{(ID, SECTION): [(DAY, START, END), ...]}` like `Subjects.time_slots`
+
+        Every day keeps its slots sorted by START so a time window
+        is found with a binary search instead of a full scan
+
+            ~"""
+    def __init__(self, time_slots: dict):
+        days = [[] for _ in DAYS]
+        for (ID, section), slots in time_slots.items():
+            for day, start, end in slots:
+                days[day].append((start, end, ID, section))
+        for entries in days:
+            entries.sort()
+        self.__days = days
+        self.__starts = [[entry[0] for entry in entries] for entries in days]
+
+    def query(self, day: int, start: int, end: int) -> list:
+        """Returns the `(ID, SECTION, START, END)` slots of `day` that
+            fit inside the `start`-`end` window, ordered by their START"""
+        entries = self.__days[day]
+        starts = self.__starts[day]
+        found = []
+        for index in range(bisect_left(starts, start), bisect_left(starts, end)):
+            slot_start, slot_end, ID, section = entries[index]
+            if slot_end <= end:
+                found.append((ID, section, slot_start, slot_end))
+        return found
+
+    def memory_size(self) -> int:
+        """Returns a rough estimate in bytes of the memory held by the index,
+            the IDs, sections and times are shared with the slots and not counted"""
+        size = getsizeof(self.__days) + getsizeof(self.__starts)
+        for entries, starts in zip(self.__days, self.__starts):
+            size += getsizeof(entries) + getsizeof(starts) + len(entries) * getsizeof((0, 0, '', ''))
+        return size
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.__days)
+
+    def __repr__(self):
+        return f"IntervalIndex(len={len(self)})"
+
+
+__all__ = ['DAYS', 'DAY_NUMBERS', 'SLOT_MINUTES', 'SLOTS_PER_DAY',
+           'parse_day', 'parse_slots', 'parse_range', 'slots_to_mask', 'day_mask',
+           'format_minutes', 'IntervalIndex']
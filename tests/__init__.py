@@ -0,0 +1,12 @@
+from os.path import abspath, dirname
+import tempfile
+import shutil
+import atexit
+import sys
+import os
+
+# the bot keeps data/ and logs/ relative to the working directory, the tests get a throwaway one
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+work_dir = tempfile.mkdtemp(prefix='edugate_tests_')
+os.chdir(work_dir)
+atexit.register(shutil.rmtree, work_dir, True)
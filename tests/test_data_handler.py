@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+import tracemalloc
+import unittest
+import gc
+
+from packages.data_handler import DataSession, STATUS, section_state
+
+
+def render(rows: list) -> str:
+    """Renders `[(ID, SECTION, NAME, TIME, CLASS, STATUS, TEACHER), ...]` as the partial response of the timetable"""
+    labels = []
+    for row, (ID, section, name, time, room, status, teacher) in enumerate(rows):
+        for code, value in (('76', ID), ('78', name), ('82', time), ('84', room),
+                            ('86', section), ('88', status), ('90', teacher)):
+            labels.append(f'<td><label id="serviceContents:scheduleDtl:{row}:j_idt{code}">{value}</label></td>')
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<partial-response><changes>'
+            '<update id="serviceContents:scheduleDtl"><![CDATA[<table><tbody><tr>'
+            + '</tr><tr>'.join(labels) +
+            '</tr></tbody></table>]]></update></changes></partial-response>')
+
+
+def scrape(session: DataSession, content: str):
+    """Runs the parse stage of `session` on `content` as if it was the posted response"""
+    session._DataSession__response = SimpleNamespace(content=content.encode('utf-8'), status_code=200)
+    session._send_post = lambda: True
+    return session._update()
+
+
+ROWS = [
+    ('100001', '1', 'برمجة الحاسوب', 'Sun Tue 08:00-09:30', 'B101', 'مفتوح', 'أحمد علي'),
+    ('100001', '2', 'برمجة الحاسوب', 'Mon Wed 08:00-09:30', 'B102', 'مغلق', 'Teacher 107'),
+    ('100002', '1', 'قواعد البيانات', 'Sun Tue 10:00-11:30', 'B103', 'Open', 'Teacher 12'),
+]
+
+
+class ScrapeTest(unittest.TestCase):
+    def setUp(self):
+        self.session = DataSession('http://localhost/timetable', 'test')
+
+    def test_non_ascii_labels(self):
+        subjects = scrape(self.session, render(ROWS))
+        self.assertTrue(subjects.parse_report.complete)
+        self.assertEqual(subjects.list['100001']['1']['name'], 'برمجة الحاسوب')
+        self.assertEqual(subjects.list['100001']['1']['teacher'], 'أحمد علي')
+        self.assertEqual(section_state(subjects.list['100001']['1']['status']), STATUS.OPEN)
+        self.assertEqual(section_state(subjects.list['100001']['2']['status']), STATUS.CLOSED)
+        self.assertIn('100001', subjects.search_by_name('برمجة'))
+
+    def test_truncated_drops_last_row_and_salvages(self):
+        scrape(self.session, render(ROWS))
+        content = render(ROWS)
+        # cut inside the last label of the second row, 'Teacher 107' becomes 'Teacher 1'
+        content = content[:content.index('Teacher 107') + len('Teacher 1')]
+        subjects = scrape(self.session, content)
+        report = subjects.parse_report
+        self.assertTrue(report.truncated)
+        self.assertEqual((report.rows, report.valid_rows, report.malformed_count), (2, 1, 1))
+        self.assertEqual(report.salvaged_sections, 2)
+        self.assertEqual(subjects.list['100001']['2']['teacher'], 'Teacher 107')
+        self.assertEqual(subjects.list['100002']['1']['name'], 'قواعد البيانات')
+
+    def test_malformed_row_salvages_only_that_row(self):
+        scrape(self.session, render(ROWS))
+        # section 100002 1 was removed and the status of section 100001 2 is missing
+        content = render(ROWS[:2]).replace('j_idt88">مغلق', 'j_idt99">مغلق')
+        subjects = scrape(self.session, content)
+        report = subjects.parse_report
+        self.assertFalse(report.truncated)
+        self.assertEqual(report.dropped, {('100001', '2')})
+        self.assertEqual(report.salvaged_sections, 1)
+        self.assertIn('2', subjects.list['100001'])
+        self.assertNotIn('100002', subjects.list)
+
+    def test_large_response_is_not_truncated(self):
+        rows = [(str(100000 + number), '1', 'برمجة ' * 60, 'Sun Tue 08:00-09:30', 'B101', 'Open', 'Teacher 1')
+                for number in range(16000)]
+        subjects = scrape(self.session, render(rows))
+        self.assertTrue(subjects.parse_report.complete)
+        self.assertEqual(subjects.parse_report.valid_rows, 16000)
+
+    def test_memory_size_counts_indexes(self):
+        rows = [(str(100000 + number), str(section), f'مادة {number}', 'Sun Tue Thu 08:00-09:00',
+                 f'B{number % 30}', 'Open', f'Teacher {number % 120}')
+                for number in range(1000) for section in range(1, 5)]
+        content = render(rows)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            subjects = scrape(self.session, content)
+            self.session._DataSession__response = None
+            gc.collect()
+            traced = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(subjects.memory_size(), traced * 0.75)
+
+    def test_invalid_responses_keep_last_snapshot(self):
+        self.assertIsNone(scrape(self.session, '<html><body>maintenance</body></html>'))
+        self.assertIsNone(scrape(self.session, '<partial-response><error><error-name>ViewExpired</error-name>'
+                                               '<error-message>x</error-message></error></partial-response>'))
+        self.assertIsNone(scrape(self.session, '<partial-response><redirect url="/login"/></partial-response>'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import gzip
+import io
+import unittest
+
+from packages import exporter
+from packages.data_handler import Subjects
+from packages.history import SectionHistory
+
+
+def snapshot(count: int) -> Subjects:
+    subjects = Subjects()
+    for number in range(count):
+        subjects.list[str(100000 + number)] = {
+            '1': {'name': f'برمجة {number % 300}', 'time': 'Sun Tue 08:00-09:30', 'class': f'B{number % 7}',
+                  'status': 'مفتوح' if number % 2 else 'Closed', 'teacher': f'Teacher {number}'},
+        }
+    return subjects
+
+
+class ColumnarTest(unittest.TestCase):
+    def round_trip(self, columns: tuple, rows: list) -> list:
+        file = io.BytesIO()
+        self.assertEqual(exporter.write_columnar(file, columns, iter(rows)), len(rows))
+        file.seek(0)
+        return list(exporter.read_columnar(file))
+
+    def test_round_trip(self):
+        rows = list(exporter.iter_rows(snapshot(3000)))
+        read = self.round_trip(exporter.COLUMNS, rows)
+        self.assertEqual(read, [dict(zip(exporter.COLUMNS, row)) for row in rows])
+
+    def test_row_group_boundaries(self):
+        for count in (0, 1, exporter.COLUMNAR_GROUP_ROWS, exporter.COLUMNAR_GROUP_ROWS + 1):
+            with self.subTest(count=count):
+                rows = [(str(number), 'مفتوح') for number in range(count)]
+                self.assertEqual(self.round_trip(('id', 'status'), rows),
+                                 [{'id': str(number), 'status': 'مفتوح'} for number in range(count)])
+
+    def test_varint(self):
+        for number in (0, 1, 127, 128, 300, 2 ** 35):
+            with self.subTest(number=number):
+                self.assertEqual(exporter._read_varint(io.BytesIO(exporter._varint(number))), number)
+
+    def test_not_columnar(self):
+        with self.assertRaises(ValueError):
+            list(exporter.read_columnar(io.BytesIO(b'{"id": "100000"}\n')))
+
+    def test_export_compressed_delta(self):
+        history = SectionHistory()
+        subjects = snapshot(10)
+        history.record(subjects)
+        since = history.version
+        changed = snapshot(10)
+        changed.list['100003']['1']['status'] = 'Open'
+        del changed.list['100004']
+        history.record(changed)
+
+        count = exporter.export(changed, 'delta.col.gz', 'col', 'gzip', since, history)
+        self.assertEqual(count, 2)
+        with gzip.open('delta.col.gz', 'rb') as file:
+            rows = {row['id']: row for row in exporter.read_columnar(file)}
+        self.assertEqual(rows['100003'][exporter.CHANGE_COLUMN], 'changed')
+        self.assertEqual(rows['100003']['status'], 'Open')
+        self.assertEqual(rows['100004'][exporter.CHANGE_COLUMN], 'removed')
+
+
+if __name__ == '__main__':
+    unittest.main()
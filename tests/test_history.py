@@ -0,0 +1,30 @@
+import unittest
+
+from packages.data_handler import Subjects
+from packages.history import SectionHistory
+
+
+def snapshot(status: str) -> Subjects:
+    subjects = Subjects()
+    subjects.list = {'100001': {'1': {'name': 'برمجة', 'time': 'Sun 08:00-09:00', 'class': 'B101',
+                                      'status': status, 'teacher': 'Teacher 1'}}}
+    return subjects
+
+
+class SectionHistoryTest(unittest.TestCase):
+    def test_read_only_does_not_write(self):
+        SectionHistory('history.jsonl').record(snapshot('Open'))
+        with open('history.jsonl', encoding='utf-8') as file:
+            saved = file.read()
+
+        history = SectionHistory('history.jsonl', read_only=True)
+        self.assertEqual(history.version, 1)
+        self.assertEqual(len(history.record(snapshot('Closed'))), 1)
+        self.assertEqual(history.version, 2)
+        with open('history.jsonl', encoding='utf-8') as file:
+            self.assertEqual(file.read(), saved)
+        self.assertEqual(SectionHistory('history.jsonl').version, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
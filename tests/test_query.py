@@ -0,0 +1,48 @@
+import unittest
+
+from packages.query import FieldIndex
+
+
+SUBJECTS = {
+    '100001': {
+        '1': {'name': 'برمجة', 'class': 'B101', 'status': 'مفتوح', 'teacher': 'Ahmad Ali'},
+        '2': {'name': 'برمجة', 'class': 'B102', 'status': 'Closed', 'teacher': 'Sara Omar'},
+    },
+    '100002': {
+        '1': {'name': 'شبكات', 'class': 'B101', 'status': 'Open', 'teacher': 'Ahmad  Ali'},
+    },
+}
+
+
+class ParseQueryTest(unittest.TestCase):
+    def test_terms(self):
+        self.assertEqual(FieldIndex.parse_query('teacher:Ahmad status:open'),
+                         [('teacher', 'Ahmad'), ('status', 'open')])
+
+    def test_value_with_spaces(self):
+        self.assertEqual(FieldIndex.parse_query('teacher:Ahmad Ali room:B101'),
+                         [('teacher', 'Ahmad Ali'), ('room', 'B101')])
+        self.assertEqual(FieldIndex.parse_query('teacher: Ahmad'), [('teacher', 'Ahmad')])
+
+    def test_field_is_case_insensitive(self):
+        self.assertEqual(FieldIndex.parse_query('CLASS:B101'), [('class', 'B101')])
+
+    def test_invalid(self):
+        for text in ('', 'Ahmad', 'name:Ahmad', 'teacher:Ahmad time:08:00', 'teacher:', 'status:open teacher:'):
+            with self.subTest(text=text):
+                self.assertIsNone(FieldIndex.parse_query(text))
+
+
+class FieldIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = FieldIndex(SUBJECTS)
+
+    def test_query(self):
+        self.assertEqual(self.index.query(FieldIndex.parse_query('teacher:ahmad ali status:open')),
+                         {('100001', '1'), ('100002', '1')})
+        self.assertEqual(self.index.query(FieldIndex.parse_query('room:b101 status:closed')), set())
+        self.assertEqual(self.index.query(FieldIndex.parse_query('teacher:sara')), {('100001', '2')})
+
+
+if __name__ == '__main__':
+    unittest.main()
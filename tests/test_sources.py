@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import unittest
+
+from packages.sources import SourceManager
+
+
+class SourceManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.manager = SourceManager({'test': {'url': 'http://localhost/timetable', 'refresh': 60}}, 10 ** 8)
+        self.source = self.manager._SourceManager__sources['test']
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def failing_run(self):
+        with self.lock:
+            self.calls += 1
+        return None
+
+    def test_failed_refresh_is_not_retried_by_every_request(self):
+        self.source.run = self.failing_run
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: self.manager.get('test'), range(32)))
+        self.assertEqual(results, [None] * 32)
+        self.assertEqual(self.calls, 1)
+
+    def test_force_update_ignores_the_backoff(self):
+        self.source.run = self.failing_run
+        self.manager.get('test')
+        self.manager.get('test', force_update=True)
+        self.assertEqual(self.calls, 2)
+
+    def test_retries_after_refresh_time(self):
+        self.source.run = self.failing_run
+        self.manager.get('test')
+        self.source.failed_at -= self.source.refresh
+        self.manager.get('test')
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
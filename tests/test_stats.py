@@ -0,0 +1,44 @@
+import unittest
+
+from packages.data_handler import Subjects
+from packages.stats import AvailabilityStats
+
+
+def snapshot() -> Subjects:
+    subjects = Subjects()
+    subjects.list = {
+        '100001': {'1': {'status': 'مفتوح', 'teacher': 'Ahmad Ali'},
+                   '2': {'status': 'Closed', 'teacher': 'Sara Omar'}},
+        '100002': {'1': {'status': 'Full', 'teacher': 'Ahmad  Ali'},
+                   '2': {'status': 'Open', 'teacher': 'Ahmad Ali'}},
+    }
+    return subjects
+
+
+class AvailabilityStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = AvailabilityStats(snapshot())
+
+    def test_counts(self):
+        self.assertEqual(self.stats.totals, {'open': 2, 'closed': 1, 'full': 1, 'other': 0})
+        self.assertEqual(self.stats.subjects['100002'], {'open': 1, 'closed': 0, 'full': 1, 'other': 0})
+        self.assertEqual(self.stats.teacher_sections('Ahmad Ali'), 2)
+
+    def test_apply(self):
+        self.stats.apply([('100001', '2', 'status', 'Closed', 'Open'),
+                          ('100001', '2', 'teacher', 'Sara Omar', 'Ahmad Ali'),
+                          ('100002', '1', 'status', 'Full', None)])
+        self.assertEqual(self.stats.totals, {'open': 3, 'closed': 0, 'full': 0, 'other': 0})
+        self.assertEqual(self.stats.teacher_sections('Ahmad Ali'), 3)
+        self.assertNotIn('Sara Omar', self.stats.teachers)
+
+    def test_teacher_info(self):
+        self.assertEqual(self.stats.get_teacher_info('ahmad  ali'),
+                         'Ahmad  Ali: 1 sections\nAhmad Ali: 2 sections\n')
+        self.assertIn('And 1 more teachers', self.stats.get_teacher_info('a', limit=2))
+        self.assertIsNone(self.stats.get_teacher_info('Omar Sara'))
+        self.assertIsNone(self.stats.get_teacher_info(' '))
+
+
+if __name__ == '__main__':
+    unittest.main()
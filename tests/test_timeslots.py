@@ -0,0 +1,77 @@
+import unittest
+
+from packages.timeslots import parse_day, parse_slots, parse_range, slots_to_mask, IntervalIndex
+
+
+class ParseSlotsTest(unittest.TestCase):
+    def test_days_then_time(self):
+        self.assertEqual(parse_slots('Sun Tue 08:00-09:30'), [(0, 480, 570), (2, 480, 570)])
+
+    def test_time_then_days(self):
+        self.assertEqual(parse_slots('08:00-09:30 Sun Tue'), [(0, 480, 570), (2, 480, 570)])
+
+    def test_several_groups(self):
+        self.assertEqual(parse_slots('Sun 08:00-09:00 Mon Wed 10:00-11:30'),
+                         [(0, 480, 540), (1, 600, 690), (3, 600, 690)])
+
+    def test_arabic_day_names(self):
+        self.assertEqual(parse_slots('الاثنين الاربعاء 10:00-11:30'), [(1, 600, 690), (3, 600, 690)])
+        self.assertEqual(parse_slots('ح ث خ 8-9'), [(0, 480, 540), (2, 480, 540), (4, 480, 540)])
+
+    def test_afternoon_times(self):
+        # 12-hour times before 7 can not be morning lectures
+        self.assertEqual(parse_slots('Sun 1-2:30'), [(0, 780, 870)])
+        self.assertEqual(parse_slots('Sun 11-1'), [(0, 660, 780)])
+        self.assertEqual(parse_slots('Sun 12:30-2'), [(0, 750, 840)])
+        self.assertEqual(parse_slots('Sun 7-8'), [(0, 420, 480)])
+
+    def test_ignores_other_numbers(self):
+        self.assertEqual(parse_slots('B101 Sun 08:00-09:00 123-125'), [(0, 480, 540)])
+
+    def test_nothing_to_parse(self):
+        self.assertEqual(parse_slots(''), [])
+        self.assertEqual(parse_slots(None), [])
+        self.assertEqual(parse_slots('Sun Tue'), [])
+        self.assertEqual(parse_slots('08:00-09:00'), [])
+
+
+class ParseRangeTest(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('8-12'), (480, 720))
+        self.assertEqual(parse_range('08:00-12:30'), (480, 750))
+        self.assertEqual(parse_range('8.30 – 10'), (510, 600))
+        self.assertEqual(parse_range('2-4'), (840, 960))
+
+    def test_invalid(self):
+        for text in ('Sun', '8', '8-12 Sun', '10-25', '108-12'):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_range(text))
+
+
+class ParseDayTest(unittest.TestCase):
+    def test_days(self):
+        self.assertEqual(parse_day('SUNDAY'), 0)
+        self.assertEqual(parse_day('الخميس'), 4)
+        # ه is often written for ة at the end of a word
+        self.assertEqual(parse_day('الجمعه'), 5)
+        self.assertIsNone(parse_day('B101'))
+
+
+class SlotsTest(unittest.TestCase):
+    def test_mask_overlap(self):
+        first = slots_to_mask(parse_slots('Sun 08:00-09:30'))
+        self.assertTrue(first & slots_to_mask(parse_slots('Sun 09:15-10:00')))
+        self.assertFalse(first & slots_to_mask(parse_slots('Sun 09:30-10:00')))
+        self.assertFalse(first & slots_to_mask(parse_slots('Mon 08:00-09:30')))
+
+    def test_interval_index(self):
+        index = IntervalIndex({('100001', '1'): parse_slots('Sun 08:00-09:30'),
+                               ('100002', '1'): parse_slots('Sun 09:00-11:00'),
+                               ('100003', '1'): parse_slots('Mon 08:00-09:00')})
+        self.assertEqual(index.query(0, 480, 600), [('100001', '1', 480, 570)])
+        self.assertEqual(len(index.query(0, 480, 660)), 2)
+        self.assertEqual(index.query(1, 600, 720), [])
+
+
+if __name__ == '__main__':
+    unittest.main()